@@ -0,0 +1 @@
+"""Simulator, benchmarks and soak harness for the SolarMax Modbus integration."""
@@ -0,0 +1,153 @@
+"""End-to-end poll benchmarks of SolarMaxModbusHub and SolarMaxHistoryCoordinator.
+
+Runs the hub against a local SolarMaxSimulator and reports poll latency
+percentiles, decode time, history import time and event loop lag. Use
+--json to write the results as a baseline and --baseline to compare a run
+against one.
+
+    python -m benchmarks.bench_poll --polls 500 --json baseline.json
+    python -m benchmarks.bench_poll --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import timeit
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.common import LoopLagMonitor, Stopwatch, async_bench_hass, percentiles, print_report
+from benchmarks.simulator import SimulatorConfig, SolarMaxSimulator
+
+# Regressions above this factor of the baseline are reported
+REGRESSION_FACTOR = 1.2
+
+
+def bench_decode(rounds: int) -> dict[str, Any]:
+    """Time decoding one live block with the compiled plan."""
+    from custom_components.solarmax_modbus_test.decode import compile_decode_plan
+    from custom_components.solarmax_modbus_test.register_map import compile_register_map, register_map_for_model
+
+    register_map = compile_register_map(register_map_for_model("SolarMax 6SMT"))
+    span = register_map.spans[0]
+    key_dict = {address - span.address: entry for address, entry in register_map.key_dict.items()}
+    plan = compile_decode_plan(key_dict, span.count)
+    registers = [(i * 7919) & 0xFFFF for i in range(span.count)]
+    data: dict[str, Any] = {}
+    published_at: dict[str, float] = {}
+
+    def decode() -> None:
+        data.clear()
+        plan.decode(registers, data, set(), published_at, 0.0)
+
+    seconds = min(timeit.repeat(decode, number=rounds, repeat=5))
+    return {"per_decode_us": round(seconds / rounds * 1e6, 3), "registers": span.count}
+
+
+async def bench_hub(hass, simulator: SolarMaxSimulator, polls: int) -> dict[str, Any]:
+    """Time full poll cycles and a history import against the simulator."""
+    from custom_components.solarmax_modbus_test import hub as hub_module
+    from custom_components.solarmax_modbus_test.register_map import compile_register_map, register_map_for_model
+
+    hub = hub_module.SolarMaxModbusHub(
+        hass, "bench", "127.0.0.1", simulator.port, scan_interval=60, ping_host="", entry_id="bench"
+    )
+    hub.set_key_dict(compile_register_map(register_map_for_model("SolarMax 6SMT")).key_dict)
+    results: dict[str, Any] = {}
+    try:
+        await hub.async_refresh()  # Connect outside of the measurement
+        polls_timer = Stopwatch()
+        failures = 0
+        for _ in range(polls):
+            async with polls_timer.time():
+                await hub.async_refresh()
+            failures += not hub.last_update_success
+        results["poll_ms"] = percentiles(polls_timer.samples)
+        results["poll_failures"] = failures
+
+        rows: list[int] = []
+        history = hub_module.SolarMaxHistoryCoordinator(hass, hub, "bench")
+        with patch.object(hub_module, "async_import_statistics", lambda _hass, _meta, stats: rows.append(len(stats))):
+            start = time.perf_counter()
+            await history.async_refresh()
+            results["history_full_import_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            results["history_rows"] = sum(rows)
+            start = time.perf_counter()
+            await history.async_refresh()
+            results["history_unchanged_import_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        rtc_timer = Stopwatch()
+        async with rtc_timer.time():
+            await history._sync_inverter_rtc()
+        results["rtc_sync_ms"] = round(rtc_timer.samples[0] * 1000, 3)
+        results["rtt"] = hub.connection.rtt.as_dict()
+    finally:
+        await hub.async_stop()
+    return results
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    simulator = SolarMaxSimulator(SimulatorConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rtc_drift=120, seed=1
+    ))
+    await simulator.start()
+    monitor = LoopLagMonitor()
+    try:
+        async with async_bench_hass() as hass:
+            monitor.start()
+            results = await bench_hub(hass, simulator, args.polls)
+            await monitor.stop()
+    finally:
+        await simulator.stop()
+    results["loop_lag_ms"] = percentiles(monitor.samples)
+    results["simulator_requests"] = simulator.requests
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Return the metrics that got slower than REGRESSION_FACTOR times the baseline."""
+    regressions = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if isinstance(value, dict) and isinstance(old, dict):
+            for key in ("p50", "p95", "p99", "per_decode_us"):
+                if key in value and old.get(key) and value[key] > old[key] * REGRESSION_FACTOR:
+                    regressions.append(f"{name}.{key}: {old[key]} -> {value[key]}")
+        elif name.endswith("_ms") and isinstance(value, (int, float)) and old:
+            if value > old * REGRESSION_FACTOR:
+                regressions.append(f"{name}: {old} -> {value}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--decode-rounds", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--jitter", type=float, default=0.001)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results written with --json")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {"decode": bench_decode(args.decode_rounds), **asyncio.run(async_run(args))}
+    print_report("SolarMax poll benchmark", results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file))
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
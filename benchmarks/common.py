@@ -0,0 +1,103 @@
+"""Helpers shared by the benchmark and soak scripts."""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs a callback that should run every interval."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+
+def percentiles(samples: list[float], scale: float = 1000.0) -> dict[str, float]:
+    """Return count, mean, p50, p95, p99 and max of samples (scaled, ms by default)."""
+    if not samples:
+        return {"count": 0}
+    if len(samples) == 1:
+        value = round(samples[0] * scale, 3)
+        return {"count": 1, "mean": value, "p50": value, "p95": value, "p99": value, "max": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "mean": round(statistics.fmean(samples) * scale, 3),
+        "p50": round(cuts[49] * scale, 3),
+        "p95": round(cuts[94] * scale, 3),
+        "p99": round(cuts[98] * scale, 3),
+        "max": round(max(samples) * scale, 3),
+    }
+
+
+def print_report(title: str, results: dict[str, Any]) -> None:
+    """Print nested results as an indented list."""
+    print(f"\n{title}")
+    for name, value in results.items():
+        if isinstance(value, dict):
+            print(f"  {name}: " + ", ".join(f"{k}={v}" for k, v in value.items()))
+        else:
+            print(f"  {name}: {value}")
+
+
+@asynccontextmanager
+async def async_bench_hass() -> AsyncIterator[Any]:
+    """Return a running test Home Assistant with the integration's domain data.
+
+    Needs the Home Assistant test helpers
+    (pip install pytest-homeassistant-custom-component).
+    """
+    from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+    from custom_components.solarmax_modbus_test import async_setup
+
+    async with async_test_home_assistant() as hass:
+        await async_setup(hass, {})
+        yield hass
+        await hass.async_block_till_done()
+
+
+class Stopwatch:
+    """Collect the durations of timed blocks."""
+
+    def __init__(self) -> None:
+        """Initialize the stopwatch."""
+        self.samples: list[float] = []
+
+    @asynccontextmanager
+    async def time(self) -> AsyncIterator[None]:
+        """Time the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - start)
@@ -0,0 +1,347 @@
+"""Local SolarMax Modbus TCP simulator for benchmarks and soak runs.
+
+Serves the registers the integration reads: the live block at 4097..4156,
+the serial number at 6672..6678, the RTC at 12288..12291 and 30 days of
+hourly history at 49152. Latency, jitter, exception replies and dropped
+requests can be injected, and a day/night script switches the simulated
+inverter on and off like the sun does (at night it stops listening).
+
+The server is a small asyncio implementation of Modbus TCP function codes
+3, 6 and 16 so that hundreds of instances stay cheap and behave the same
+with every pymodbus version the integration supports.
+
+Run standalone:  python -m benchmarks.simulator --port 5020
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import math
+import random
+import struct
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+_LOGGER = logging.getLogger(__name__)
+
+LIVE_ADDRESS = 4097
+SERIAL_ADDRESS = 6672
+RTC_ADDRESS = 12288
+HISTORY_ADDRESS = 49152
+HISTORY_DAY_REGISTERS = 48
+HISTORY_DAYS = 30
+
+MODE_ONGRID = 3
+MODE_STANDBY = 1
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_ADDRESS = 0x02
+DEVICE_FAILURE = 0x04
+
+_MBAP = struct.Struct(">HHHB")
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of one simulated inverter."""
+
+    host: str = "127.0.0.1"
+    port: int = 0  # 0 picks a free port on the first start
+    unit_id: int | None = None  # None answers every unit id
+    latency: float = 0.005  # seconds before each reply
+    jitter: float = 0.002  # +- seconds added to latency
+    error_rate: float = 0.0  # share of requests answered with an exception
+    drop_rate: float = 0.0  # share of requests never answered
+    peak_power: float = 6000.0  # W at noon
+    day_length: float = 600.0  # seconds from sunrise to sunset of a simulated day
+    start_phase: float = 0.25  # point of the day at start, 0 = sunrise, 0.5 = noon
+    serial_number: str = "2245-0000001"
+    rtc_drift: float = 0.0  # seconds the inverter clock is off at start
+    # Day/night script: (seconds, "day" | "night") steps, repeated
+    script: list[tuple[float, str]] = field(default_factory=list)
+    seed: int | None = None
+
+
+class SolarMaxSimulator:
+    """One simulated SolarMax inverter behind its own TCP port."""
+
+    def __init__(self, config: SimulatorConfig | None = None) -> None:
+        """Initialize the simulator."""
+        self.config = config or SimulatorConfig()
+        self.port = self.config.port
+        self.requests = 0
+        self.errors_injected = 0
+        self.drops_injected = 0
+        self.connections = 0
+        self._registers = array("H", bytes(2 * 65536))
+        self._random = random.Random(self.config.seed)
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._script_task: asyncio.Task | None = None
+        self._sunrise = time.monotonic()
+        self._energy_total = 12345.0  # kWh
+        self._energy_today = 0.0
+        self._last_update = time.monotonic()
+        self._rtc_offset = self.config.rtc_drift
+        self._fill_static()
+
+    @property
+    def online(self) -> bool:
+        """Return True while the inverter is on (day)."""
+        return self._server is not None
+
+    async def start(self) -> None:
+        """Start listening and run the day/night script if one is set."""
+        await self.sunrise()
+        self._sunrise -= self.config.start_phase * self.config.day_length
+        if self.config.script:
+            self._script_task = asyncio.create_task(self._async_run_script())
+
+    async def stop(self) -> None:
+        """Stop the script and the server."""
+        if self._script_task is not None:
+            self._script_task.cancel()
+            self._script_task = None
+        await self.sunset()
+
+    async def sunrise(self) -> None:
+        """Switch the inverter on: listen again and start a new day."""
+        if self._server is not None:
+            return
+        self._sunrise = time.monotonic()
+        self._energy_today = 0.0
+        self._server = await asyncio.start_server(self._handle_client, self.config.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.debug(f"Simulator listening on {self.config.host}:{self.port}")
+
+    async def sunset(self) -> None:
+        """Switch the inverter off: close the server and all connections."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        self._roll_history_day()
+
+    async def _async_run_script(self) -> None:
+        """Repeat the day/night script."""
+        while True:
+            for seconds, phase in self.config.script:
+                if phase == "day":
+                    await self.sunrise()
+                else:
+                    await self.sunset()
+                await asyncio.sleep(seconds)
+
+    def _fill_static(self) -> None:
+        """Write serial number and 30 days of history."""
+        serial = self.config.serial_number.encode("ascii")[:14].ljust(14, b"\0")
+        self._registers[SERIAL_ADDRESS:SERIAL_ADDRESS + 7] = array("H", struct.unpack(">7H", serial))
+        today = datetime.now()
+        for day_offset in range(HISTORY_DAYS):
+            self._write_history_day(day_offset, today - timedelta(days=day_offset))
+
+    def _write_history_day(self, day_offset: int, date: datetime) -> None:
+        """Write one day of hourly history with a bell shaped production curve."""
+        start = HISTORY_ADDRESS + day_offset * HISTORY_DAY_REGISTERS
+        block = [0] * HISTORY_DAY_REGISTERS
+        block[0] = date.day
+        weather = self._random.uniform(0.3, 1.0)
+        for hour in range(24):
+            sun = max(0.0, math.sin(math.pi * (hour - 6) / 14)) if 6 <= hour <= 20 else 0.0
+            block[1 + 2 * hour] = int(sun * weather * self.config.peak_power / 10)  # 0.01 kWh
+        self._registers[start:start + HISTORY_DAY_REGISTERS] = array("H", block)
+
+    def _roll_history_day(self) -> None:
+        """Shift the history by one day at sunset and record today."""
+        end = HISTORY_ADDRESS + HISTORY_DAYS * HISTORY_DAY_REGISTERS
+        self._registers[HISTORY_ADDRESS + HISTORY_DAY_REGISTERS:end] = self._registers[
+            HISTORY_ADDRESS:end - HISTORY_DAY_REGISTERS
+        ]
+        self._write_history_day(0, datetime.now())
+
+    def _update_live(self) -> None:
+        """Recompute the live block for the current point of the simulated day."""
+        now = time.monotonic()
+        phase = ((now - self._sunrise) % self.config.day_length) / self.config.day_length
+        power = max(0.0, math.sin(math.pi * phase)) * self.config.peak_power
+        power *= self._random.uniform(0.97, 1.03)
+        self._energy_today += power * (now - self._last_update) / 3600000
+        self._last_update = now
+        regs = self._registers
+        address = LIVE_ADDRESS
+        for _ in range(3):  # L1..L3: voltage, current, power (32 bit), frequency
+            voltage = 230 + self._random.uniform(-2, 2)
+            regs[address] = int(voltage * 10)
+            regs[address + 1] = int(power / 3 / voltage * 100)
+            regs[address + 2:address + 4] = _u32(power / 3 * 10)
+            regs[address + 4] = int((50 + self._random.uniform(-0.05, 0.05)) * 100)
+            address += 5
+        for _ in range(3):  # PV1..PV3: voltage, current, power (32 bit)
+            voltage = 400 + self._random.uniform(-10, 10)
+            regs[address] = int(voltage * 10)
+            regs[address + 1] = int(power / 3 / voltage * 100)
+            regs[address + 2:address + 4] = _u32(power / 3 * 10)
+            address += 4
+        regs[4124] = 35 + int(power / 500)
+        regs[4125] = MODE_ONGRID if power > 50 else MODE_STANDBY
+        regs[4129:4131] = _u32(self._energy_total + self._energy_today)
+        regs[4131:4133] = _u32(20000 + (now - self._sunrise) / 3600)
+        regs[4133:4135] = _u32(self._energy_today)
+        regs[4135:4137] = _u32(self._energy_today * 1000)
+        regs[4151:4153] = _u32(power * 10)
+        regs[4153:4155] = _u32(power * 0.05 * 10)
+        regs[4155:4157] = _u32(max(_from_u32(regs[4155:4157]), power * 10))
+
+    def _update_rtc(self) -> None:
+        """Write the inverter clock (running with its drift) to the RTC registers."""
+        now = datetime.now() + timedelta(seconds=self._rtc_offset)
+        self._registers[RTC_ADDRESS:RTC_ADDRESS + 4] = array("H", [
+            now.year, now.month * 256 + now.day, now.hour * 256 + now.minute, 45 * 256 + now.second
+        ])
+
+    def _set_rtc(self) -> None:
+        """Take over the clock written to the RTC registers."""
+        year, month_day, hour_minute, second = self._registers[RTC_ADDRESS:RTC_ADDRESS + 4]
+        try:
+            written = datetime(year, month_day >> 8, month_day & 0xFF, hour_minute >> 8, hour_minute & 0xFF, second & 0xFF)
+        except ValueError:
+            return
+        self._rtc_offset = (written - datetime.now()).total_seconds()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve Modbus TCP requests of one connection."""
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, protocol_id, length, unit_id = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                if self.config.unit_id is not None and unit_id != self.config.unit_id:
+                    continue  # Other units on the bus do not answer
+                delay = self.config.latency + self._random.uniform(-self.config.jitter, self.config.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self._random.random() < self.config.drop_rate:
+                    self.drops_injected += 1
+                    continue
+                if self._random.random() < self.config.error_rate:
+                    self.errors_injected += 1
+                    reply = bytes((pdu[0] | 0x80, DEVICE_FAILURE))
+                else:
+                    reply = self._execute(pdu)
+                writer.write(_MBAP.pack(transaction_id, protocol_id, len(reply) + 1, unit_id) + reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _execute(self, pdu: bytes) -> bytes:
+        """Execute one request PDU and return the reply PDU."""
+        function = pdu[0]
+        if function == 3:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if not 1 <= count <= 125 or address + count > 65536:
+                return bytes((function | 0x80, ILLEGAL_ADDRESS))
+            if address < LIVE_ADDRESS + 60 and address + count > LIVE_ADDRESS:
+                self._update_live()
+            if address < RTC_ADDRESS + 4 and address + count > RTC_ADDRESS:
+                self._update_rtc()
+            values = self._registers[address:address + count]
+            return struct.pack(f">BB{count}H", function, count * 2, *values)
+        if function == 6:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            self._registers[address] = value
+            if RTC_ADDRESS <= address < RTC_ADDRESS + 4:
+                self._set_rtc()
+            return pdu[:5]
+        if function == 16:
+            address, count, _ = struct.unpack_from(">HHB", pdu, 1)
+            self._registers[address:address + count] = array("H", struct.unpack_from(f">{count}H", pdu, 6))
+            if address < RTC_ADDRESS + 4 and address + count > RTC_ADDRESS:
+                self._set_rtc()
+            return pdu[:5]
+        return bytes((function | 0x80, ILLEGAL_FUNCTION))
+
+
+def _u32(value: float) -> array:
+    """Split a value into two big-endian 16 bit registers."""
+    value = max(0, int(value)) & 0xFFFFFFFF
+    return array("H", (value >> 16, value & 0xFFFF))
+
+
+def _from_u32(registers: array) -> int:
+    """Join two big-endian 16 bit registers."""
+    return (registers[0] << 16) | registers[1]
+
+
+def _parse_script(text: str) -> list[tuple[float, str]]:
+    """Parse "day:600,night:300" into script steps."""
+    steps = []
+    for step in filter(None, text.split(",")):
+        phase, seconds = step.split(":")
+        if phase not in ("day", "night"):
+            raise argparse.ArgumentTypeError(f"Unknown phase {phase}")
+        steps.append((float(seconds), phase))
+    return steps
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    simulators = []
+    for index in range(args.count):
+        config = SimulatorConfig(
+            host=args.host,
+            port=args.port + index if args.port else 0,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            drop_rate=args.drop_rate,
+            day_length=args.day_length,
+            serial_number=f"2245-{index + 1:07d}",
+            rtc_drift=args.rtc_drift,
+            script=args.script,
+        )
+        simulator = SolarMaxSimulator(config)
+        await simulator.start()
+        simulators.append(simulator)
+        print(f"SolarMax simulator {config.serial_number} on {args.host}:{simulator.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for simulator in simulators:
+            await simulator.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020, help="first port, 0 picks free ports")
+    parser.add_argument("--count", type=int, default=1, help="number of inverters on consecutive ports")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--day-length", type=float, default=600.0)
+    parser.add_argument("--rtc-drift", type=float, default=0.0)
+    parser.add_argument("--script", type=_parse_script, default=[], help='e.g. "day:600,night:300"')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Fleet scale soak run: N simulated inverters against one Home Assistant event loop.
+
+Starts N SolarMaxSimulator endpoints with a day/night script, and a
+SolarMaxModbusHub plus SolarMaxHistoryCoordinator for each of them, all
+driven by the shared poll scheduler. Sunrises trigger RTC syncs and history
+imports through the mode change signal. At the end it reports throughput,
+poll latency percentiles, event loop lag, RSS growth, open sockets and
+tasks left behind after all hubs were stopped.
+
+    python -m benchmarks.soak --inverters 200 --duration 600 --day 120 --night 60
+
+Every simulator listens on its own loopback address (127.0.x.y) so the
+per-host limit of the scheduler applies like in a real fleet; this works
+out of the box on Linux, elsewhere use --single-host.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import time
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.common import LoopLagMonitor, async_bench_hass, percentiles, print_report
+from benchmarks.simulator import SimulatorConfig, SolarMaxSimulator
+
+
+def rss_mb() -> float:
+    """Return the resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak instead of current RSS (kilobytes on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_files() -> int | None:
+    """Return the number of open file descriptors (sockets included)."""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def _host(index: int, single_host: bool) -> str:
+    """Return the loopback address of simulator index."""
+    if single_host:
+        return "127.0.0.1"
+    return f"127.0.{index // 250}.{index % 250 + 1}"
+
+
+async def async_soak(args: argparse.Namespace) -> dict[str, Any]:
+    from custom_components.solarmax_modbus_test import hub as hub_module
+    from custom_components.solarmax_modbus_test.register_map import compile_register_map, register_map_for_model
+
+    script = [(args.day, "day"), (args.night, "night")]
+    simulators = []
+    for index in range(args.inverters):
+        simulator = SolarMaxSimulator(SimulatorConfig(
+            host=_host(index, args.single_host),
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            drop_rate=args.drop_rate,
+            day_length=args.day,
+            start_phase=0.0,
+            serial_number=f"2245-{index + 1:07d}",
+            rtc_drift=120,
+            script=script,
+            seed=index,
+        ))
+        await simulator.start()
+        simulators.append(simulator)
+
+    key_dict = compile_register_map(register_map_for_model("SolarMax 6SMT")).key_dict
+    poll_samples: list[float] = []
+    poll_failures = 0
+    imported_rows: list[int] = []
+    results: dict[str, Any] = {"inverters": args.inverters}
+
+    def _timed(update):
+        async def _async_timed_update():
+            nonlocal poll_failures
+            start = time.perf_counter()
+            try:
+                return await update()
+            except Exception:
+                poll_failures += 1
+                raise
+            finally:
+                poll_samples.append(time.perf_counter() - start)
+        return _async_timed_update
+
+    monitor = LoopLagMonitor(interval=0.01)
+    try:
+        async with async_bench_hass() as hass:
+            tasks_before = len(asyncio.all_tasks())
+            files_before = open_files()
+            rss_before = rss_mb()
+            pairs = []
+            with patch.object(
+                hub_module, "async_import_statistics", lambda _hass, _meta, stats: imported_rows.append(len(stats))
+            ):
+                for index, simulator in enumerate(simulators):
+                    hub = hub_module.SolarMaxModbusHub(
+                        hass, f"soak_{index}", simulator.config.host, simulator.port,
+                        scan_interval=args.scan_interval, ping_host="", fast_poll=args.fast_poll,
+                        entry_id=f"soak_{index}",
+                    )
+                    hub.set_key_dict(key_dict)
+                    # Time every poll, the instance attribute shadows the method
+                    hub._async_update_data = _timed(hub._async_update_data)
+                    if hub.fast_coordinator is not None:
+                        hub.fast_coordinator._async_update_data = _timed(hub.fast_coordinator._async_update_data)
+                    history = hub_module.SolarMaxHistoryCoordinator(hass, hub, f"soak_{index}")
+                    pairs.append((hub, history))
+
+                monitor.start()
+                started = time.monotonic()
+                start_tasks = []
+                for hub, history in pairs:
+                    await hub.start_coordinator()
+                    start_tasks.append(
+                        hass.async_create_background_task(history.async_start(), f"{hub.name} history start")
+                    )
+                rss_samples = []
+                while (elapsed := time.monotonic() - started) < args.duration:
+                    await asyncio.sleep(min(args.report_interval, args.duration - elapsed))
+                    rss_samples.append(rss_mb())
+                    scheduler = hass.data["solarmax_modbus_test"]["scheduler"].stats
+                    print(
+                        f"{elapsed:6.0f}s polls={len(poll_samples)} failures={poll_failures} "
+                        f"lag_max={scheduler['lag_max_ms']}ms rss={rss_samples[-1]:.1f}MiB "
+                        f"files={open_files()} tasks={len(asyncio.all_tasks())}"
+                    )
+                duration = time.monotonic() - started
+                results["scheduler"] = hass.data["solarmax_modbus_test"]["scheduler"].stats
+                results["open_files_during_run"] = open_files()
+
+                for task in start_tasks:
+                    task.cancel()
+                for hub, history in pairs:
+                    await history.async_stop()
+                    await hub.async_stop()
+                await monitor.stop()
+                await hass.async_block_till_done()
+                await asyncio.sleep(0.1)
+            results["leaked_tasks"] = len(asyncio.all_tasks()) - tasks_before
+            files_after = open_files()
+            results["leaked_files"] = files_after - files_before if files_before is not None and files_after is not None else None
+            results["rss_mb"] = {
+                "before": round(rss_before, 1),
+                "peak": round(max(rss_samples, default=rss_before), 1),
+                "growth": round(max(rss_samples, default=rss_before) - rss_before, 1),
+                "per_hub_kb": round((max(rss_samples, default=rss_before) - rss_before) * 1024 / args.inverters, 1),
+            }
+    finally:
+        for simulator in simulators:
+            await simulator.stop()
+
+    results["duration_s"] = round(duration, 1)
+    results["polls"] = len(poll_samples)
+    results["poll_failures"] = poll_failures
+    results["polls_per_s"] = round(len(poll_samples) / duration, 1)
+    results["poll_ms"] = percentiles(poll_samples)
+    results["loop_lag_ms"] = percentiles(monitor.samples)
+    results["history_rows_imported"] = sum(imported_rows)
+    results["history_imports"] = len(imported_rows)
+    results["modbus_requests"] = sum(simulator.requests for simulator in simulators)
+    results["cpu_s"] = round(time.process_time(), 1)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=300, help="seconds")
+    parser.add_argument("--scan-interval", type=int, default=5)
+    parser.add_argument("--fast-poll", action="store_true")
+    parser.add_argument("--day", type=float, default=120, help="seconds of a simulated day")
+    parser.add_argument("--night", type=float, default=60, help="seconds of a simulated night")
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--report-interval", type=float, default=10)
+    parser.add_argument("--single-host", action="store_true", help="run all simulators on 127.0.0.1")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(async_soak(args))
+    print_report(f"SolarMax soak run with {args.inverters} inverters", results)
+
+
+if __name__ == "__main__":
+    main()
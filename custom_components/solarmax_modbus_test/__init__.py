@@ -3,15 +3,59 @@
 from __future__ import annotations
 
 import logging
+import time
+from collections.abc import Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_validation as cv
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
 
-from .const import DOMAIN, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DEFAULT_FAST_POLL, ATTR_MANUFACTURER
+from .const import (
+    DOMAIN,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_FAST_POLL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_UNIT_ID,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_NIGHT_MODE,
+    DEFAULT_RTC_DRIFT_THRESHOLD,
+    DEFAULT_METRICS_ENDPOINT,
+    DEFAULT_SAMPLE_BUFFER_DEPTH,
+    CONF_UNIT_ID,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_NIGHT_MODE,
+    CONF_RTC_DRIFT_THRESHOLD,
+    CONF_METRICS_ENDPOINT,
+    CONF_SAMPLE_BUFFER_DEPTH,
+    CONF_FAST_POLL,
+    CONF_FAST_SCAN_INTERVAL,
+    HISTORY_STORAGE_VERSION,
+    ONLINE_MODES,
+    ATTR_MANUFACTURER,
+)
 from .hub import SolarMaxModbusHub, SolarMaxHistoryCoordinator
+from .connection import ModbusConnectionPool
+from .liveness import LivenessTracker
+from .metadata import DeviceMetadataCache
+from .openmetrics import async_register_metrics_view
+from .register_map import compile_register_map, register_map_for_model
+from .samples import write_binary, write_csv
+from .scheduler import SolarMaxPollScheduler
 from icmplib import SocketPermissionError, async_ping
 
 _PLATFORMS: list[Platform] = [Platform.SENSOR]
@@ -20,6 +64,16 @@ type New_NameConfigEntry = ConfigEntry[SolarMaxModbusHub]
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+EXPORT_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required("config_entry_id"): cv.string,
+        vol.Required("filename"): cv.string,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("format", default="csv"): vol.In(["csv", "binary"]),
+    }
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 # Reduce pymodbus verbosity globally
@@ -29,39 +83,90 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the SolarMax Modbus component."""
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN]["icmp_privileged"] = await _can_use_icmp_lib_with_privilege()
+    hass.data[DOMAIN]["scheduler"] = SolarMaxPollScheduler(hass)
+    hass.data[DOMAIN]["connection_pool"] = ModbusConnectionPool()
+    hass.data[DOMAIN]["liveness"] = LivenessTracker(hass, hass.data[DOMAIN]["icmp_privileged"])
+
+    async def handle_export_samples(call: ServiceCall) -> ServiceResponse:
+        """Write the buffered polls of one inverter in a time range to a file."""
+        entry = hass.config_entries.async_get_entry(call.data["config_entry_id"])
+        if entry is None or entry.domain != DOMAIN or entry.entry_id not in hass.data[DOMAIN]:
+            raise ServiceValidationError(f"SolarMax entry {call.data['config_entry_id']} is not loaded")
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+        filename = call.data["filename"]
+        if not hass.config.is_allowed_path(filename):
+            raise ServiceValidationError(f"Writing to {filename} is not allowed, add it to allowlist_external_dirs")
+        hub: SolarMaxModbusHub = entry_data["hub"]
+        # The UI sends naive times, they are in the time zone of Home Assistant
+        start = dt_util.as_local(call.data["start"]).timestamp() if "start" in call.data else None
+        end = dt_util.as_local(call.data["end"]).timestamp() if "end" in call.data else None
+        # Copy the range on the event loop, the file is written in the executor
+        samples = hub.samples.snapshot(start, end)
+        writer = write_binary if call.data["format"] == "binary" else write_csv
+        try:
+            rows = await hass.async_add_executor_job(writer, filename, hub.samples.keys, samples)
+        except OSError as e:
+            raise HomeAssistantError(f"Failed to write {filename}: {e}") from e
+        _LOGGER.info(f"Exported {rows} samples of {hub.name} to {filename}")
+        return {"rows": rows}
+
+    hass.services.async_register(
+        DOMAIN, "export_samples", handle_export_samples,
+        schema=EXPORT_SAMPLES_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: New_NameConfigEntry) -> bool:
     """Set up home-assistant-solar-max-modbus from a config entry."""
+    setup_started = time.monotonic()
 
-    hub = await _create_hub(hass, entry)
+    hub = _create_hub(hass, entry)
 
     if not hub:
         return False
 
-    # Try to read serial number for device info (skip if inverter is offline)
-    try:
-        serial_number, model = await hub.async_read_serial_number()
-    except Exception as e:
-        _LOGGER.info(f"Could not read serial number during setup (inverter may be offline): {e}")
-        serial_number, model = None, None
+    # Serial number and model select the register map. Use the cached ones,
+    # without a cache the default map is used until the identity read in the
+    # background detected another model
+    metadata = DeviceMetadataCache(hass, entry.entry_id)
+    await metadata.async_load()
+    serial_number, model = metadata.serial_number, metadata.model
+
+    # Set the register map before the platforms are forwarded, the first
+    # poll of the scheduler then already reads all registers
+    register_map = compile_register_map(register_map_for_model(model))
+    hub.set_key_dict(register_map.key_dict)
 
     # Create history coordinator
-    history_coordinator = SolarMaxHistoryCoordinator(hass, hub)
+    history_coordinator = SolarMaxHistoryCoordinator(hass, hub, entry.entry_id)
     
     hass.data[DOMAIN][entry.entry_id] = {
         "hub": hub,
         "history_coordinator": history_coordinator,
-        "device_info": _create_device_info(entry, serial_number, model)
+        "device_info": _create_device_info(entry, serial_number, model),
+        "register_map": register_map,
     }
 
+    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    if entry.options.get(CONF_METRICS_ENDPOINT, DEFAULT_METRICS_ENDPOINT):
+        async_register_metrics_view(hass)
+
     # Start the main and fast coordinator scheduling
     await hub.start_coordinator()
-    
-    # Start history coordinator (will run daily at configured hour)
-    await history_coordinator.async_start()
 
-    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
+    # RTC sync and history import run in the background once HA has started
+    @callback
+    def _async_start_history(_hass: HomeAssistant) -> None:
+        entry.async_create_background_task(
+            hass, history_coordinator.async_start(), f"{entry.title} history start"
+        )
+
+    entry.async_on_unload(async_at_started(hass, _async_start_history))
+
+    # Refresh the cached identity the first time the inverter is online,
+    # without a cache read it right away, alongside the first poll
+    _async_refresh_metadata_when_online(hass, entry, hub, metadata, read_now=not metadata.cached)
     
     # Register service for manual history import
     async def handle_import_history(call):
@@ -71,16 +176,43 @@ async def async_setup_entry(hass: HomeAssistant, entry: New_NameConfigEntry) ->
     
     hass.services.async_register(DOMAIN, "import_history", handle_import_history)
 
+    _LOGGER.info(f"Set up {entry.title} in {time.monotonic() - setup_started:.2f}s")
     return True
 
 
 # TODO Update entry annotation
 async def async_unload_entry(hass: HomeAssistant, entry: New_NameConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+    if unload_ok:
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["history_coordinator"].async_stop()
+        await entry_data["hub"].async_stop()
+    return unload_ok
+
 
+async def async_remove_entry(hass: HomeAssistant, entry: New_NameConfigEntry) -> None:
+    """Remove persisted data of a deleted config entry."""
+    await async_remove_device_data(hass, entry.entry_id)
 
-async def _create_hub(hass: HomeAssistant, entry: New_NameConfigEntry) -> SolarMaxModbusHub | None:
+
+async def async_remove_device_data(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored identity and history import state of an entry's inverter."""
+    await Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}").async_remove()
+    await DeviceMetadataCache(hass, entry_id).async_remove()
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: New_NameConfigEntry) -> None:
+    """Reload if fast polling was switched, entities move to another coordinator."""
+    hub: SolarMaxModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    # The view is never unregistered, it only serves entries that opted in
+    if entry.options.get(CONF_METRICS_ENDPOINT, DEFAULT_METRICS_ENDPOINT):
+        async_register_metrics_view(hass)
+    if entry.options.get(CONF_FAST_POLL, DEFAULT_FAST_POLL) != hub.fast_poll:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _create_hub(hass: HomeAssistant, entry: New_NameConfigEntry) -> SolarMaxModbusHub | None:
     """Helper function to create the SolarMax Modbus hub."""
     hub = None
     try:
@@ -93,17 +225,92 @@ async def _create_hub(hass: HomeAssistant, entry: New_NameConfigEntry) -> SolarM
             entry.options.get(CONF_SCAN_INTERVAL, entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
             entry.options.get("ping_host", entry.data.get("ping_host", None)),
             entry.options.get("check_status_first", entry.data.get("check_status_first", True)),
+            fast_poll=entry.options.get(CONF_FAST_POLL, DEFAULT_FAST_POLL),
+            fast_scan_interval=entry.options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+            unit_id=entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+            heartbeat_interval=entry.options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+            adaptive_polling=entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+            min_scan_interval=entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            max_scan_interval=entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+            night_mode=entry.options.get(CONF_NIGHT_MODE, DEFAULT_NIGHT_MODE),
+            rtc_drift_threshold=entry.options.get(CONF_RTC_DRIFT_THRESHOLD, DEFAULT_RTC_DRIFT_THRESHOLD),
+            entry_id=entry.entry_id,
+            sample_buffer_depth=entry.options.get(CONF_SAMPLE_BUFFER_DEPTH, DEFAULT_SAMPLE_BUFFER_DEPTH),
         )
-        # Ensure the scan_interval is correctly passed to the hub
-        scan_interval = entry.options.get(CONF_SCAN_INTERVAL, entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
-        _LOGGER.info(f"Setting scan interval to {scan_interval} seconds")
-        _LOGGER.info(f"Starting hub with first refresh...")
-        await hub.async_config_entry_first_refresh()
-        _LOGGER.info(f"Hub first refresh completed, coordinator should run every {scan_interval} seconds")
     except Exception as e:
         _LOGGER.error(f"Failed to set up SolarMax Modbus hub: {e}")
     return hub
 
+
+@callback
+def _async_refresh_metadata_when_online(
+    hass: HomeAssistant,
+    entry: New_NameConfigEntry,
+    hub: SolarMaxModbusHub,
+    metadata: DeviceMetadataCache,
+    read_now: bool = False,
+) -> None:
+    """Read serial number and model again once the inverter is online.
+
+    With read_now the first read starts immediately. A failed read is
+    retried the next time the inverter comes online. The entry is reloaded
+    only if the detected model uses another register map.
+    """
+    unsub: Callable[[], None] | None = None
+    refreshing = False
+
+    async def _async_refresh() -> None:
+        nonlocal refreshing
+        try:
+            serial_number, model = await hub.async_read_serial_number()
+        finally:
+            refreshing = False
+        if serial_number is None and model is None:
+            _LOGGER.debug(f"Device metadata of {entry.title} not read, retrying when it is online again")
+            return
+        _async_unsubscribe()
+        if not await metadata.async_update(serial_number, model):
+            return
+        _LOGGER.info(f"Device metadata of {entry.title} changed: serial {serial_number}, model {model}")
+        device_info = _create_device_info(entry, serial_number, model)
+        previous_map = register_map_for_model(hass.data[DOMAIN][entry.entry_id]["device_info"].get("model"))
+        hass.data[DOMAIN][entry.entry_id]["device_info"] = device_info
+        device_registry = dr.async_get(hass)
+        if device := device_registry.async_get_device(identifiers=device_info["identifiers"]):
+            device_registry.async_update_device(device.id, serial_number=serial_number, model=model)
+        if register_map_for_model(model) is not previous_map:
+            # The model selects the register map and with it the entities
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+
+    @callback
+    def _async_unsubscribe() -> None:
+        nonlocal unsub
+        if unsub is not None:
+            unsub()
+            unsub = None
+
+    @callback
+    def _async_start_refresh() -> None:
+        nonlocal refreshing
+        if refreshing or unsub is None:
+            return
+        refreshing = True
+        entry.async_create_background_task(hass, _async_refresh(), f"{entry.title} metadata refresh")
+
+    @callback
+    def _async_mode_changed(previous: str | None, mode: str | None) -> None:
+        if mode in ONLINE_MODES:
+            _async_start_refresh()
+
+    unsub = async_dispatcher_connect(hass, hub.signal_mode_changed, _async_mode_changed)
+    entry.async_on_unload(_async_unsubscribe)
+    if read_now:
+        _async_start_refresh()
+    else:
+        # The inverter may have come online during the first poll already
+        _async_mode_changed(None, hub.inverter_data.get("InverterMode"))
+
+
 def _create_device_info(entry: New_NameConfigEntry, serial_number: str | None = None, model: str | None = None) -> dict:
     """Create the device info for SolarMax Modbus hub."""
     device_info = {
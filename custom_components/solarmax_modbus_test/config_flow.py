@@ -12,7 +12,35 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.util.network import is_host_valid
 import homeassistant.helpers.config_validation as cv
 
-from .const import DEFAULT_NAME, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DOMAIN, DEFAULT_FAST_POLL
+from . import async_remove_device_data
+from .const import (
+    DEFAULT_NAME,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    DEFAULT_FAST_POLL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_UNIT_ID,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_NIGHT_MODE,
+    DEFAULT_RTC_DRIFT_THRESHOLD,
+    DEFAULT_METRICS_ENDPOINT,
+    DEFAULT_SAMPLE_BUFFER_DEPTH,
+    CONF_UNIT_ID,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_NIGHT_MODE,
+    CONF_RTC_DRIFT_THRESHOLD,
+    CONF_METRICS_ENDPOINT,
+    CONF_SAMPLE_BUFFER_DEPTH,
+    CONF_FAST_POLL,
+    CONF_FAST_SCAN_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,9 +49,20 @@ CONFIG_DATA_SCHEMA = vol.Schema(
     vol.Required(CONF_NAME, default=DEFAULT_NAME): str,
     vol.Required(CONF_HOST): str,
     vol.Required(CONF_PORT, default=DEFAULT_PORT):cv.port,
+    vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(int, vol.Range(min=0, max=247)),
     vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.All(int, vol.Range(min=5, msg="invalid_scan_interval")),
     vol.Optional("ping_host", default=""): str,
     vol.Optional("check_status_first", default=True): bool,
+    vol.Optional(CONF_FAST_POLL, default=DEFAULT_FAST_POLL): bool,
+    vol.Optional(CONF_FAST_SCAN_INTERVAL, default=DEFAULT_FAST_SCAN_INTERVAL): vol.All(int, vol.Range(min=1, msg="invalid_fast_scan_interval")),
+    vol.Optional(CONF_HEARTBEAT_INTERVAL, default=DEFAULT_HEARTBEAT_INTERVAL): vol.All(int, vol.Range(min=0)),
+    vol.Optional(CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING): bool,
+    vol.Optional(CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_NIGHT_MODE, default=DEFAULT_NIGHT_MODE): bool,
+    vol.Optional(CONF_RTC_DRIFT_THRESHOLD, default=DEFAULT_RTC_DRIFT_THRESHOLD): vol.All(int, vol.Range(min=0)),
+    vol.Optional(CONF_METRICS_ENDPOINT, default=DEFAULT_METRICS_ENDPOINT): bool,
+    vol.Optional(CONF_SAMPLE_BUFFER_DEPTH, default=DEFAULT_SAMPLE_BUFFER_DEPTH): vol.All(int, vol.Range(min=0)),
     }
 )
 
@@ -44,13 +83,33 @@ async def validate_input(hass: HomeAssistant, user_data: dict[str, Any]): # -> d
             data[name] = user_data[name]
     if not is_host_valid(user_data[CONF_HOST]):
         errors[CONF_HOST] = "invalid host"
-    if user_data["ping_host"] != "" and not is_host_valid(user_data["ping_host"]):
-        errors["ping_host"] = "invalid host"
+    errors.update(validate_options(user_data))
 
     # Return info that you want to store in the config entry.
     return errors, data, options
 
 
+def validate_options(user_data: dict[str, Any]) -> dict[str, str]:
+    """Validate the options shared by the config, reconfigure and options steps."""
+    errors = {}
+    ping_host = user_data.get("ping_host", "")
+    if ping_host != "" and not is_host_valid(ping_host):
+        errors["ping_host"] = "invalid host"
+    min_scan_interval = user_data.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+    max_scan_interval = user_data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+    if min_scan_interval > max_scan_interval:
+        errors[CONF_MAX_SCAN_INTERVAL] = "invalid_scan_interval_bounds"
+    return errors
+
+
+def _unique_id(user_data: dict[str, Any]) -> str:
+    """Return host:port, plus the unit id if several inverters share a gateway."""
+    unique_id = user_data[CONF_HOST] + ":" + str(user_data[CONF_PORT])
+    if user_data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID) != DEFAULT_UNIT_ID:
+        unique_id += ":" + str(user_data[CONF_UNIT_ID])
+    return unique_id
+
+
 class SolarMaxConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for home-assistant-solar-max-modbus."""
 
@@ -69,7 +128,7 @@ class SolarMaxConfigFlow(ConfigFlow, domain=DOMAIN):
                 errors["base"] = f"unknown error {e}"
 
             if not errors:
-                await self.async_set_unique_id(user_input[CONF_HOST] + ":" + str(user_input[CONF_PORT]))
+                await self.async_set_unique_id(_unique_id(user_input))
                 self._abort_if_unique_id_configured(error="host/port already configured")
                 return self.async_create_entry(title=user_input[CONF_NAME], data=data, options=options)
 
@@ -89,15 +148,65 @@ class SolarMaxConfigFlow(ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception(f"Unexpected exception {e}")
                 errors["base"] = f"unknown error {e}"
             if not errors:
-                await self.async_set_unique_id(user_input[CONF_HOST] + ":" + str(user_input[CONF_PORT]))
-                _LOGGER.info(f"{user_input[CONF_HOST] + ":" + str(user_input[CONF_PORT])}")
-                self._abort_if_unique_id_configured(error="host/port already configured")
-                return self.async_update_reload_and_abort(
-                    self._get_reconfigure_entry(),
+                entry = self._get_reconfigure_entry()
+                unique_id = _unique_id(user_input)
+                _LOGGER.info(f"{unique_id}")
+                if unique_id != entry.unique_id:
+                    await self.async_set_unique_id(unique_id)
+                    self._abort_if_unique_id_configured(error="host/port already configured")
+                hub = self.hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get("hub")
+                if (
+                    user_input[CONF_HOST] != entry.options.get(CONF_HOST, entry.data.get(CONF_HOST))
+                    or user_input[CONF_UNIT_ID] != entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+                ):
+                    # Another inverter may answer at the new address, forget
+                    # the identity and imported history of the old one
+                    await self.hass.config_entries.async_unload(entry.entry_id)
+                    await async_remove_device_data(self.hass, entry.entry_id)
+                    hub = None
+                if (
+                    hub is None
+                    or user_input[CONF_NAME] != entry.data[CONF_NAME]
+                    or options[CONF_FAST_POLL] != hub.fast_poll
+                ):
+                    # Identity, name and fast polling change the entities, reload
+                    return self.async_update_reload_and_abort(
+                        entry,
+                        unique_id=unique_id,
+                        title=user_input[CONF_NAME],
+                        data_updates=data,
+                        options=options
+                    )
+                # Everything else is applied to the running hub
+                await hub.reconfigure_connection_settings(
+                    user_input[CONF_HOST],
+                    user_input[CONF_PORT],
+                    user_input[CONF_SCAN_INTERVAL],
+                    user_input["ping_host"],
+                    user_input["check_status_first"],
+                    user_input[CONF_UNIT_ID],
+                )
+                await hub.update_runtime_settings(
+                    user_input[CONF_SCAN_INTERVAL],
+                    user_input["ping_host"],
+                    user_input["check_status_first"],
+                    user_input[CONF_FAST_SCAN_INTERVAL],
+                    user_input[CONF_HEARTBEAT_INTERVAL],
+                    user_input[CONF_ADAPTIVE_POLLING],
+                    user_input[CONF_MIN_SCAN_INTERVAL],
+                    user_input[CONF_MAX_SCAN_INTERVAL],
+                    user_input[CONF_NIGHT_MODE],
+                    user_input[CONF_RTC_DRIFT_THRESHOLD],
+                    user_input[CONF_SAMPLE_BUFFER_DEPTH],
+                )
+                self.hass.config_entries.async_update_entry(
+                    entry,
+                    unique_id=unique_id,
                     title=user_input[CONF_NAME],
-                    data_updates=data,
-                    options=options
+                    data={**entry.data, **data},
+                    options=options,
                 )
+                return self.async_abort(reason="reconfigure_successful")
         data_schema = self.add_suggested_values_to_schema(CONFIG_DATA_SCHEMA, self._get_reconfigure_entry().data)
         data_schema = self.add_suggested_values_to_schema(data_schema, self._get_reconfigure_entry().options)
         return self.async_show_form(
@@ -118,7 +227,10 @@ class SolarMaxModbusOptionsFlowHandler(OptionsFlowWithConfigEntry):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
+            errors = validate_options(user_input)
+        if user_input is not None and not errors:
             try:
                 # Get the hub from the saved data with robust default handling
                 hub = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id, {}).get("hub")
@@ -128,7 +240,15 @@ class SolarMaxModbusOptionsFlowHandler(OptionsFlowWithConfigEntry):
                     await hub.update_runtime_settings(
                         user_input[CONF_SCAN_INTERVAL],
                         user_input["ping_host"],
-                        user_input.get("check_status_first", True)
+                        user_input.get("check_status_first", True),
+                        user_input.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+                        user_input.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+                        user_input.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+                        user_input.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                        user_input.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                        user_input.get(CONF_NIGHT_MODE, DEFAULT_NIGHT_MODE),
+                        user_input.get(CONF_RTC_DRIFT_THRESHOLD, DEFAULT_RTC_DRIFT_THRESHOLD),
+                        user_input.get(CONF_SAMPLE_BUFFER_DEPTH, DEFAULT_SAMPLE_BUFFER_DEPTH),
                     )
                 else:
                     # Hub not found - just log warning but continue to save options
@@ -147,6 +267,7 @@ class SolarMaxModbusOptionsFlowHandler(OptionsFlowWithConfigEntry):
         opt_data_schema = vol.Schema(opts)
         return self.async_show_form(
             step_id="init",
-            data_schema=self.add_suggested_values_to_schema(opt_data_schema, self.config_entry.options)
+            data_schema=self.add_suggested_values_to_schema(opt_data_schema, user_input or self.config_entry.options),
+            errors=errors,
         )
 
@@ -0,0 +1,324 @@
+"""Modbus TCP connections shared by all hubs behind the same gateway."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+from typing import Any
+
+from pymodbus.client import AsyncModbusTcpClient
+
+from .const import (
+    CIRCUIT_BACKOFF_MAX,
+    CIRCUIT_BACKOFF_MIN,
+    CIRCUIT_FAILURE_THRESHOLD,
+    RTT_INITIAL_TIMEOUT,
+    RTT_MAX_RETRIES,
+    RTT_MAX_TIMEOUT,
+    RTT_MIN_TIMEOUT,
+    RTT_RETRY_BUDGET,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# pymodbus renamed the unit id keyword from "slave" to "device_id" in 3.10
+_UNIT_KWARG = (
+    "device_id"
+    if "device_id" in inspect.signature(AsyncModbusTcpClient.read_holding_registers).parameters
+    else "slave"
+)
+
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting while the circuit of a connection is open."""
+
+
+class CircuitBreaker:
+    """Circuit breaker guarding the connect attempts to one gateway.
+
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens
+    and every attempt fails fast until a jittered, exponentially growing
+    backoff has passed. Then one attempt is let through (half-open): success
+    closes the circuit, failure opens it again with twice the backoff.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        backoff_min: float = CIRCUIT_BACKOFF_MIN,
+        backoff_max: float = CIRCUIT_BACKOFF_MAX,
+    ) -> None:
+        """Initialize the breaker."""
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._failure_threshold = failure_threshold
+        self._backoff_min = backoff_min
+        self._backoff_max = backoff_max
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    def check(self) -> None:
+        """Allow an attempt or raise CircuitOpenError."""
+        if self.state == CIRCUIT_CLOSED:
+            return
+        remaining = self._retry_at - time.monotonic()
+        if self.state == CIRCUIT_HALF_OPEN or remaining > 0:
+            raise CircuitOpenError(f"Circuit open, next attempt in {max(remaining, 0):.0f}s")
+        self.state = CIRCUIT_HALF_OPEN
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful attempt."""
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._backoff = 0.0
+
+    def abort(self) -> None:
+        """Reopen the circuit after a half-open attempt that ended without a result.
+
+        The backoff is kept, not doubled, as the gateway was never asked.
+        """
+        if self.state != CIRCUIT_HALF_OPEN:
+            return
+        self._retry_at = time.monotonic() + max(self._backoff, self._backoff_min) * random.uniform(0.5, 1.0)
+        self.state = CIRCUIT_OPEN
+
+    def record_failure(self) -> float | None:
+        """Count a failed attempt, return the backoff if the circuit opened."""
+        self.failures += 1
+        if self.state != CIRCUIT_HALF_OPEN and self.failures < self._failure_threshold:
+            return None
+        self._backoff = min(max(self._backoff * 2, self._backoff_min), self._backoff_max)
+        # Full jitter on the upper half so gateways do not retry in lockstep
+        delay = self._backoff * random.uniform(0.5, 1.0)
+        self._retry_at = time.monotonic() + delay
+        self.state = CIRCUIT_OPEN
+        self.opened += 1
+        return delay
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened,
+            "backoff": round(self._backoff, 1),
+            "retry_in": round(max(self._retry_at - time.monotonic(), 0.0), 1) if self.state != CIRCUIT_CLOSED else 0.0,
+        }
+
+
+class RttEstimator:
+    """Smoothed round-trip time and retransmission timeout, after RFC 6298.
+
+    The retransmission timeout (RTO) is SRTT + 4 * RTTVAR clamped to
+    RTT_MIN_TIMEOUT and RTT_MAX_TIMEOUT. Within one request the timeout
+    doubles on every attempt, and all attempts of a request fit into
+    RTT_RETRY_BUDGET seconds. A backed-off timeout is only kept for the next
+    request if the request was answered on a retry (Karn's rule); after a
+    request that got no answer at all the next one starts from the RTO again.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the estimator."""
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.rto = RTT_INITIAL_TIMEOUT
+        self.timeout = self.rto  # Timeout of the first attempt of the next request
+        self.samples = 0
+        self.timeouts = 0
+
+    def attempt_timeouts(self) -> list[float]:
+        """Return the timeouts of the attempts of the next request."""
+        timeouts = [min(self.timeout, RTT_RETRY_BUDGET)]
+        left = RTT_RETRY_BUDGET - timeouts[0]
+        timeout = min(self.timeout * 2, RTT_MAX_TIMEOUT)
+        while len(timeouts) <= RTT_MAX_RETRIES and timeout <= left:
+            timeouts.append(timeout)
+            left -= timeout
+            timeout = min(timeout * 2, RTT_MAX_TIMEOUT)
+        return timeouts
+
+    @property
+    def retries(self) -> int:
+        """Return the number of retries of the next request."""
+        return len(self.attempt_timeouts()) - 1
+
+    def sample(self, rtt: float) -> None:
+        """Add the round-trip time of a request answered on its first attempt."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+        self.rto = min(max(self.srtt + 4 * self.rttvar, RTT_MIN_TIMEOUT), RTT_MAX_TIMEOUT)
+        self.timeout = self.rto
+
+    def keep_backoff(self, timeout: float) -> None:
+        """Start the next request with the timeout of an attempt answered on a retry."""
+        self.timeout = timeout
+
+    def reset(self) -> None:
+        """Start the next request from the RTO after a request got no answer."""
+        self.timeout = self.rto
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the estimator state for diagnostics (milliseconds)."""
+        return {
+            "srtt_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None,
+            "rttvar_ms": round(self.rttvar * 1000, 1),
+            "rto_ms": round(self.rto * 1000, 1),
+            "timeout_ms": round(self.timeout * 1000, 1),
+            "retries": self.retries,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
+
+
+class ModbusConnection:
+    """One Modbus TCP connection to host:port, shared by several unit ids.
+
+    Requests are serialized so responses can never be matched to the wrong
+    hub, and concurrent reconnect attempts are collapsed into one. Connect
+    attempts to an unreachable gateway are throttled by a CircuitBreaker.
+    Timeouts and retries of all requests follow the measured round-trip
+    time of the gateway (RttEstimator) instead of fixed values.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the connection."""
+        self.host = host
+        self.port = port
+        self.users = 0
+        # Timeouts and retries are handled in _async_request, the client's
+        # own timeout is only the upper bound. pymodbus must not reconnect
+        # in the background: reconnects only happen in async_connect, where
+        # the circuit breaker and night mode apply
+        self._client = AsyncModbusTcpClient(
+            host=host, port=port, timeout=RTT_MAX_TIMEOUT, retries=0, reconnect_delay=0
+        )
+        self._request_lock = asyncio.Lock()
+        self._connect_lock = asyncio.Lock()
+        self.breaker = CircuitBreaker()
+        self.rtt = RttEstimator()
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the TCP connection is established."""
+        return self._client.connected
+
+    async def async_connect(self) -> None:
+        """Connect unless connected, raise ConnectionError on failure.
+
+        Raises CircuitOpenError without touching the socket while the
+        circuit is open.
+        """
+        if self._client.connected:
+            return
+        self.breaker.check()
+        try:
+            async with self._connect_lock:
+                if self._client.connected:
+                    # Another hub reconnected while we were waiting
+                    self.breaker.record_success()
+                    return
+                _LOGGER.info(f"Connecting to Modbus client at {self.host}:{self.port}...")
+                try:
+                    await asyncio.wait_for(self._client.connect(), max(self.rtt.timeout, RTT_INITIAL_TIMEOUT))
+                except Exception as e:
+                    _LOGGER.warning(f"connection error {e}")
+                if not self._client.connected:
+                    if (delay := self.breaker.record_failure()) is not None:
+                        _LOGGER.error(
+                            f"Failed to connect to Modbus client at {self.host}:{self.port}, "
+                            f"retrying in {delay:.0f}s"
+                        )
+                    else:
+                        _LOGGER.error(f"Failed to connect to Modbus client at {self.host}:{self.port}")
+                    raise ConnectionError(f"Failed to connect to {self.host}:{self.port}")
+                self.breaker.record_success()
+                _LOGGER.info(f"Connected to Modbus client at {self.host}:{self.port}")
+        finally:
+            # A half-open attempt that was cancelled must not leave the
+            # circuit half-open, which would reject every later attempt
+            self.breaker.abort()
+
+    async def _async_request(self, method, *args, **kwargs):
+        """Run a request with RTT derived timeout and retries.
+
+        Only requests answered on their first attempt are sampled (Karn's
+        rule), a retried response cannot be matched to its attempt. Raises
+        TimeoutError once all attempts timed out.
+        """
+        async with self._request_lock:
+            timeouts = self.rtt.attempt_timeouts()
+            for attempt, timeout in enumerate(timeouts):
+                start = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(method(*args, **kwargs), timeout)
+                except asyncio.TimeoutError:
+                    self.rtt.timeouts += 1
+                    _LOGGER.debug(f"Request to {self.host}:{self.port} timed out (attempt {attempt + 1}/{len(timeouts)})")
+                    if attempt + 1 == len(timeouts):
+                        self.rtt.reset()
+                        raise
+                    continue
+                if attempt == 0:
+                    self.rtt.sample(time.monotonic() - start)
+                else:
+                    self.rtt.keep_backoff(timeout)
+                return result
+
+    async def read_holding_registers(self, address: int, count: int, unit_id: int):
+        """Read holding registers of a unit."""
+        return await self._async_request(
+            self._client.read_holding_registers, address, count=count, **{_UNIT_KWARG: unit_id}
+        )
+
+    async def write_register(self, address: int, value: int, unit_id: int):
+        """Write a single holding register of a unit."""
+        return await self._async_request(self._client.write_register, address, value, **{_UNIT_KWARG: unit_id})
+
+    async def write_registers(self, address: int, values: list[int], unit_id: int):
+        """Write consecutive holding registers of a unit."""
+        return await self._async_request(self._client.write_registers, address, values, **{_UNIT_KWARG: unit_id})
+
+    def close(self) -> None:
+        """Close the TCP connection."""
+        self._client.close()
+
+
+class ModbusConnectionPool:
+    """Pool of Modbus TCP connections keyed by host:port."""
+
+    def __init__(self) -> None:
+        """Initialize the pool."""
+        self._connections: dict[tuple[str, int], ModbusConnection] = {}
+
+    def acquire(self, host: str, port: int) -> ModbusConnection:
+        """Return the shared connection for host:port."""
+        connection = self._connections.get((host, port))
+        if connection is None:
+            connection = self._connections[(host, port)] = ModbusConnection(host, port)
+        connection.users += 1
+        return connection
+
+    def release(self, connection: ModbusConnection) -> None:
+        """Give back a connection, closing it when its last user is gone."""
+        connection.users -= 1
+        if connection.users <= 0:
+            self._connections.pop((connection.host, connection.port), None)
+            connection.close()
+
+    def __len__(self) -> int:
+        """Return the number of open connections."""
+        return len(self._connections)
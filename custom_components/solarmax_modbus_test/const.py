@@ -1,5 +1,6 @@
 """Constants for the home-assistant-solar-max-modbus integration."""
 
+from datetime import timedelta
 
 from homeassistant.const import (
     UnitOfElectricCurrent,
@@ -8,6 +9,7 @@ from homeassistant.const import (
     UnitOfReactivePower,
     UnitOfEnergy,
     UnitOfFrequency,
+    UnitOfTemperature,
     UnitOfTime
 )
 from homeassistant.components.sensor import (
@@ -21,65 +23,215 @@ DOMAIN = "solarmax_modbus_test"
 DEFAULT_NAME = "SolarMax Test"
 DEFAULT_SCAN_INTERVAL = 10
 DEFAULT_PORT = 502
+DEFAULT_UNIT_ID = 1
 CONF_SOLARMAX_HUB = "solarmax_hub"
 DEFAULT_FAST_POLL = False
+DEFAULT_FAST_SCAN_INTERVAL = 2
+# Adaptive polling: interval bounds in seconds
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_MIN_SCAN_INTERVAL = 5
+DEFAULT_MAX_SCAN_INTERVAL = 300
+# Relative AC power change between two polls above which the interval drops
+# to the minimum, and below which it grows by half
+ADAPTIVE_FAST_CHANGE = 0.1
+ADAPTIVE_STABLE_CHANGE = 0.02
+# Power (W) below which changes are measured against this value instead
+ADAPTIVE_MIN_POWER = 100
+# Modes without production, polled at the maximum interval
+ADAPTIVE_IDLE_MODES = ("Standby", "Initial Mode")
+# Night mode: polling stops this long after sunset and resumes this long
+# before sunrise
+DEFAULT_NIGHT_MODE = False
+NIGHT_MODE_DUSK_OFFSET = timedelta(minutes=30)
+NIGHT_MODE_DAWN_WINDOW = timedelta(minutes=30)
+# Sensors write their state at least this often (seconds) even if unchanged
+DEFAULT_HEARTBEAT_INTERVAL = 300
+# The inverter clock is only set if it is off by more than this (seconds)
+DEFAULT_RTC_DRIFT_THRESHOLD = 30
+# Polls kept in the sample buffer of each hub for export (0 = off)
+DEFAULT_SAMPLE_BUFFER_DEPTH = 3600
+# Expose the poll metrics at /api/<domain>/metrics in the OpenMetrics format
+DEFAULT_METRICS_ENDPOINT = False
+
+# Inverter modes between which a hub signals an online/offline transition
+ONLINE_MODES = ("OnGrid", "Standby", "Initial Mode")
+OFFLINE_MODES = ("offline", "Resolve Error", "Shutdown", "Error")
+# Dispatcher signal sent by a hub on every inverter mode change, formatted
+# with the config entry id
+SIGNAL_MODE_CHANGED = f"{DOMAIN}_mode_changed_{{}}"
+
+# Limits of the shared poll scheduler
+DEFAULT_MAX_CONCURRENT_POLLS = 8
+DEFAULT_MAX_POLLS_PER_HOST = 1
+# Background liveness probing of ping hosts (seconds): probe period and how
+# long a ping result or successful Modbus read counts as proof of liveness
+LIVENESS_PROBE_INTERVAL = 10
+LIVENESS_TTL = 30
+# Circuit breaker of a gateway connection: consecutive failed connects before
+# the circuit opens, and the range of the exponential backoff (seconds)
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_BACKOFF_MIN = 10
+CIRCUIT_BACKOFF_MAX = 600
+# Modbus request timeouts (seconds) derived from the measured round-trip
+# time: timeout before the first sample, clamp range, and the time budget
+# all retries of one request have to fit in
+RTT_INITIAL_TIMEOUT = 1.0
+RTT_MIN_TIMEOUT = 0.05
+RTT_MAX_TIMEOUT = 5.0
+RTT_RETRY_BUDGET = 3.0
+RTT_MAX_RETRIES = 2
+
+CONF_UNIT_ID = "unit_id"
+CONF_FAST_POLL = "fast_poll"
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_NIGHT_MODE = "night_mode"
+CONF_RTC_DRIFT_THRESHOLD = "rtc_drift_threshold"
+CONF_METRICS_ENDPOINT = "metrics_endpoint"
+CONF_SAMPLE_BUFFER_DEPTH = "sample_buffer_depth"
+
+# History: one block of 48 registers per day (day of month followed by
+# 24 hourly values in every 2nd register), today first, 30 days back
+# Inverter clock: year, month/day, hour/minute, 45/second
+RTC_ADDRESS = 12288
+RTC_REGISTERS = 4
+HISTORY_ADDRESS = 49152
+HISTORY_DAY_REGISTERS = 48
+HISTORY_DAYS = 30
+HISTORY_STORAGE_VERSION = 1
+DEVICE_STORAGE_VERSION = 1
+
+# Modbus limit for a single holding register read
+MAX_READ_REGISTERS = 125
+# Unused registers between two fields that are still read in one span
+# rather than split into a second request (a skipped register costs two
+# bytes, a second request costs a full round trip)
+MAX_READ_GAP = 32
+# At most this many registers of another tier's fields are read along to
+# bridge a gap, so the frequent fast tier reads stay close to its own fields
+MAX_READ_OTHER_TIER = 4
+
+# Optional per-field deadband: "deadband" (absolute, native unit) and/or
+# "deadband_rel" (fraction of the published value). Smaller changes are not
+# published until the published value is older than "max_age" seconds.
+# The tables below only suppress last-digit noise: every deadband is 1.5 LSB
+# of its field (0.15 V, 0.015 A, 0.015 Hz), so a change of one LSB is held
+# back and a change of two is published.
+DEFAULT_DEADBAND_MAX_AGE = 300
+
+# Fast tier: power, current and mode, polled every fast_scan_interval if
+# fast_poll is enabled. Slow tier: energy counters, hours and temperature,
+# polled every scan_interval.
+TIER_FAST = "fast"
+TIER_SLOW = "slow"
 
 SENSOR_TYPES = {}
 
 line_sensor = [
     {"name": "Voltage",   "type": "UINT16", "factor":  0.1,
      "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave", "tier": TIER_FAST,
+     "deadband": 0.15},
     {"name": "Current",   "type": "UINT16", "factor": 0.01,
      "unit": UnitOfElectricCurrent.AMPERE, "device_class": SensorDeviceClass.CURRENT,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-ac"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-ac", "tier": TIER_FAST,
+     "deadband": 0.015},
     {"name": "Power",     "type": "UINT32", "factor":  0.1,
      "unit": UnitOfPower.WATT, "device_class": SensorDeviceClass.POWER,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:transmission-tower"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:transmission-tower", "tier": TIER_FAST},
     {"name": "Frequency", "type": "UINT16", "factor": 0.01,
      "unit": UnitOfFrequency.HERTZ, "device_class": SensorDeviceClass.FREQUENCY,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave", "tier": TIER_FAST,
+     "deadband": 0.015},
 ]
 
 pv_sensor = [
     {"name": "Voltage",   "type": "UINT16", "factor":  0.1,
      "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-dc"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-dc", "tier": TIER_FAST,
+     "deadband": 0.15},
     {"name": "Current",   "type": "UINT16", "factor": 0.01,
      "unit": UnitOfElectricCurrent.AMPERE, "device_class": SensorDeviceClass.CURRENT,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-dc"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:current-dc", "tier": TIER_FAST,
+     "deadband": 0.015},
     {"name": "Power",     "type": "UINT32", "factor":  0.1,
      "unit": UnitOfPower.WATT, "device_class": SensorDeviceClass.POWER,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:solar-power"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:solar-power", "tier": TIER_FAST},
 ]
 
 energy_sensor = [
     {"name": "Total Energy", "type": "UINT32", "factor":  1,
      "unit": UnitOfEnergy.KILO_WATT_HOUR, "device_class": SensorDeviceClass.ENERGY,
-     "state_class": SensorStateClass.TOTAL_INCREASING, "icon": "mdi:solar-power"},
+     "state_class": SensorStateClass.TOTAL_INCREASING, "icon": "mdi:solar-power", "tier": TIER_SLOW},
     {"name": "Total Hours", "type": "UINT32", "factor":  1,
      "unit": UnitOfTime.HOURS, "device_class": SensorDeviceClass.DURATION,
-     "state_class": SensorStateClass.TOTAL_INCREASING, "icon": "mdi:timeline-clock-outline"},
+     "state_class": SensorStateClass.TOTAL_INCREASING, "icon": "mdi:timeline-clock-outline", "tier": TIER_SLOW},
     {"name": "Today Energy", "type": "UINT32", "factor":  1,
      "unit": UnitOfEnergy.KILO_WATT_HOUR, "device_class": SensorDeviceClass.ENERGY,
-     "state_class": SensorStateClass.TOTAL, "icon": "mdi:solar-power"},
+     "state_class": SensorStateClass.TOTAL, "icon": "mdi:solar-power", "tier": TIER_SLOW},
     {"name": "Today Energy2", "type": "UINT32", "factor":  0.001,
      "unit": UnitOfEnergy.KILO_WATT_HOUR, "device_class": SensorDeviceClass.ENERGY,
-     "state_class": SensorStateClass.TOTAL, "icon": "mdi:solar-power"},
+     "state_class": SensorStateClass.TOTAL, "icon": "mdi:solar-power", "tier": TIER_SLOW},
 ]
 
 power_sensors = [
     {"name": "Active Power", "type": "UINT32", "factor":  0.1,
      "unit": UnitOfPower.WATT, "device_class": SensorDeviceClass.POWER,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:flash"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:flash", "tier": TIER_FAST},
     {"name": "Reactive Power", "type": "UINT32", "factor":  0.1,
      "unit": UnitOfReactivePower.VOLT_AMPERE_REACTIVE, "device_class": SensorDeviceClass.REACTIVE_POWER,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:flash-outline"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:flash-outline", "tier": TIER_FAST},
     {"name": "Today max Power", "type": "UINT32", "factor":  0.1,
      "unit": UnitOfPower.WATT, "device_class": SensorDeviceClass.POWER,
-     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:solar-power"},
+     "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:solar-power", "tier": TIER_SLOW},
+]
+
+status_sensors = [
+    {"name": "Temperature", "type": "UINT16", "factor": 1,
+     "unit": UnitOfTemperature.CELSIUS, "device_class": None,
+     "state_class": None, "icon": "mdi:thermometer", "tier": TIER_SLOW},
+    {"name": "Inverter Mode", "key": "InverterMode", "type": "STATUS_INVERTER_MODE", "factor": 1,
+     "unit": None, "device_class": None,
+     "state_class": None, "icon": "mdi:information-outline", "tier": TIER_FAST},
+]
+
+
+def _register_group(address: int, sensors: list[dict], count: int = 1,
+                    key: str = "{name}", name: str = "{name}") -> list[dict]:
+    """Lay out sensors back to back from address, repeated count times (L1..L3, PV1..PV3)."""
+    fields = []
+    for n in range(1, count + 1):
+        for sens in sensors:
+            field_name = name.format(n=n, name=sens["name"])
+            field_key = sens.get("key") or key.format(n=n, name=sens["name"]).replace(" ", "_")
+            fields.append({**sens, "key": field_key, "name": field_name, "address": address})
+            address += 1
+            if str(sens["type"]).endswith("32"):
+                address += 1
+            elif str(sens["type"]).endswith("64"):
+                address += 3
+    return fields
+
+
+# Live data register map of the SP series (4097..4156)
+_SP_REGISTER_MAP = [
+    *_register_group(4097, line_sensor, count=3, key="L{n}{name}", name="L{n} {name}"),
+    *_register_group(4112, pv_sensor, count=3, key="PV{n}{name}", name="PV{n} {name}"),
+    *_register_group(4124, status_sensors),
+    *_register_group(4129, energy_sensor),
+    *_register_group(4151, power_sensors),
 ]
 
+# The SMT series uses the same live data layout as the SP series
+REGISTER_MAPS = {
+    "SP": _SP_REGISTER_MAP,
+    "SMT": _SP_REGISTER_MAP,
+}
+DEFAULT_REGISTER_MAP = "SP"
+
 STATUS_INVERTER_MODE = {
   0: "Initial Mode",
   1: "Standby",
@@ -0,0 +1,146 @@
+"""Precompiled decoding of SolarMax holding register blocks."""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Any
+
+from pymodbus.client import AsyncModbusTcpClient
+
+from . import const as _const
+from .const import DEFAULT_DEADBAND_MAX_AGE
+
+
+@dataclass(frozen=True)
+class DecodePlan:
+    """Decode plan for one contiguous block of holding registers.
+
+    The raw register list is packed once into big-endian bytes and then
+    unpacked with a single struct format that skips unmapped registers.
+    Fields with a deadband only publish a new value once it differs from the
+    published one by more than the deadband, or the published value is
+    older than max_age seconds.
+
+    sampled maps field values (before any deadband, status fields as raw
+    code) to columns of a sample row.
+    """
+
+    count: int
+    raw: struct.Struct
+    fields: struct.Struct
+    scaled: tuple[tuple[str, int, float], ...]
+    filtered: tuple[tuple[str, int, float, float, float, float], ...]
+    status: tuple[tuple[str, int, dict[int, str]], ...]
+    sampled: tuple[tuple[int, float, int], ...] = ()
+
+    def decode(
+        self,
+        registers: list[int],
+        data: dict[str, Any],
+        changed: set[str],
+        published_at: dict[str, float],
+        now: float,
+        row: array | None = None,
+    ) -> None:
+        """Decode registers into data and add the keys whose value changed.
+
+        published_at holds the time a deadband field was last published.
+        If row is given, the unfiltered values are also written into it.
+        Raises struct.error if the number of registers does not match.
+        """
+        values = self.fields.unpack(self.raw.pack(*registers))
+        if row is not None:
+            for index, factor, column in self.sampled:
+                row[column] = values[index] * factor
+        for key, index, factor in self.scaled:
+            value = values[index] * factor
+            if data.get(key) != value:
+                data[key] = value
+                changed.add(key)
+        for key, index, factor, deadband, deadband_rel, max_age in self.filtered:
+            value = values[index] * factor
+            published = data.get(key)
+            if published == value:
+                continue
+            if (
+                published is not None
+                and abs(value - published) <= max(deadband, abs(published) * deadband_rel)
+                and now - published_at.get(key, now) < max_age
+            ):
+                continue
+            data[key] = value
+            published_at[key] = now
+            changed.add(key)
+        for key, index, table in self.status:
+            q = values[index]
+            value = table.get(q, f"unknown {q}")
+            if data.get(key) != value:
+                data[key] = value
+                changed.add(key)
+
+
+def register_width(data_type: str) -> tuple[str, int]:
+    """Return struct code and number of registers for a register type."""
+    if data_type.startswith("STATUS"):
+        return "H", 1
+    try:
+        code, length = AsyncModbusTcpClient.DATATYPE[data_type].value
+    except KeyError:
+        raise ValueError(f"Unknown register type {data_type}") from None
+    if length == 0:
+        raise ValueError(f"Register type {data_type} has no fixed width")
+    return code, length
+
+
+def compile_decode_plan(key_dict: dict[int, dict[str, Any]], count: int,
+                        columns: dict[str, int] | None = None) -> DecodePlan:
+    """Compile a key_dict (offset -> key/type/factor/deadband) into a DecodePlan.
+
+    columns maps keys to their column in a sample row (see SampleBuffer).
+    """
+    fmt = [">"]
+    scaled: list[tuple[str, int, float]] = []
+    filtered: list[tuple[str, int, float, float, float, float]] = []
+    status: list[tuple[str, int, dict[int, str]]] = []
+    sampled: list[tuple[int, float, int]] = []
+    position = 0
+    for index, offset in enumerate(sorted(key_dict)):
+        entry = key_dict[offset]
+        if offset < position:
+            raise ValueError(f"Register offset {offset} ({entry['key']}) overlaps previous field")
+        if offset > position:
+            fmt.append(f"{(offset - position) * 2}x")
+        data_type: str = entry["type"]
+        code, length = register_width(data_type)
+        if columns and entry["key"] in columns:
+            sampled.append((index, 1.0 if data_type.startswith("STATUS") else entry["factor"], columns[entry["key"]]))
+        if data_type.startswith("STATUS"):
+            status.append((entry["key"], index, getattr(_const, data_type, None) or {}))
+        elif entry.get("deadband") or entry.get("deadband_rel"):
+            filtered.append((
+                entry["key"],
+                index,
+                entry["factor"],
+                entry.get("deadband", 0.0),
+                entry.get("deadband_rel", 0.0),
+                entry.get("max_age", DEFAULT_DEADBAND_MAX_AGE),
+            ))
+        else:
+            scaled.append((entry["key"], index, entry["factor"]))
+        fmt.append(code)
+        position = offset + length
+    if position > count:
+        raise ValueError(f"Register map needs {position} registers, block has only {count}")
+    if position < count:
+        fmt.append(f"{(count - position) * 2}x")
+    return DecodePlan(
+        count=count,
+        raw=struct.Struct(f">{count}H"),
+        fields=struct.Struct("".join(fmt)),
+        scaled=tuple(scaled),
+        filtered=tuple(filtered),
+        status=tuple(status),
+        sampled=tuple(sampled),
+    )
@@ -0,0 +1,41 @@
+"""Diagnostics support for the SolarMax Modbus integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .hub import SolarMaxModbusHub
+
+TO_REDACT = {"serial_number"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    hub: SolarMaxModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    connection = hub.connection
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "device_info": async_redact_data(hass.data[DOMAIN][entry.entry_id]["device_info"], TO_REDACT),
+        "connection": {
+            "host": connection.host,
+            "port": connection.port,
+            "connected": connection.connected,
+            "shared_by": connection.users,
+            "circuit": connection.breaker.as_dict(),
+            "rtt": connection.rtt.as_dict(),
+        },
+        "poll_interval": hub.poll_interval,
+        "suspended_until": hub.suspended_until.isoformat() if hub.suspended_until else None,
+        "inverter_data": hub.inverter_data,
+        "metrics": hub.metrics.as_dict(),
+        "samples": {"rows": len(hub.samples), "depth": hub.samples.depth, "memory_bytes": hub.samples.memory},
+        "scheduler": hass.data[DOMAIN]["scheduler"].stats,
+    }
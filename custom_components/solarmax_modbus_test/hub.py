@@ -1,34 +1,86 @@
 
 import asyncio
+import hashlib
 import logging
+import struct
 import time
 from typing import Any
 from datetime import timedelta, datetime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.sun import get_astral_event_next
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.statistics import async_import_statistics
 from homeassistant.util import dt as dt_util
-from pymodbus.client import AsyncModbusTcpClient
 from random import randint
-from icmplib import NameLookupError, async_ping
-from .const import DOMAIN
-from . import const as _const
+from icmplib import NameLookupError
+from .connection import CircuitOpenError, ModbusConnection, ModbusConnectionPool
+from .const import (
+    DOMAIN,
+    ADAPTIVE_FAST_CHANGE,
+    ADAPTIVE_IDLE_MODES,
+    ADAPTIVE_MIN_POWER,
+    ADAPTIVE_STABLE_CHANGE,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_FAST_POLL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_NIGHT_MODE,
+    DEFAULT_RTC_DRIFT_THRESHOLD,
+    DEFAULT_SAMPLE_BUFFER_DEPTH,
+    DEFAULT_UNIT_ID,
+    HISTORY_ADDRESS,
+    HISTORY_DAY_REGISTERS,
+    HISTORY_DAYS,
+    HISTORY_STORAGE_VERSION,
+    MAX_READ_REGISTERS,
+    NIGHT_MODE_DAWN_WINDOW,
+    NIGHT_MODE_DUSK_OFFSET,
+    OFFLINE_MODES,
+    ONLINE_MODES,
+    RTC_ADDRESS,
+    RTC_REGISTERS,
+    SIGNAL_MODE_CHANGED,
+    TIER_FAST,
+    TIER_SLOW,
+)
+from .decode import DecodePlan, compile_decode_plan
+from .liveness import LivenessTracker
+from .metrics import HubMetrics
+from .register_map import ReadSpan, compute_read_spans
+from .samples import SampleBuffer
+from .scheduler import SolarMaxPollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 # Reduce pymodbus verbosity
 logging.getLogger("pymodbus").setLevel(logging.WARNING)
 
+def _history_fingerprint(registers: list[int]) -> str:
+    """Return a short content hash of the raw registers of a history day."""
+    return hashlib.blake2b(struct.pack(f">{len(registers)}H", *registers), digest_size=8).hexdigest()
+
+
 class SolarMaxModbusHub(DataUpdateCoordinator[dict[str, Any]]):
     """SolarMax Modbus hub."""
-    def __init__(self, hass: HomeAssistant, name: str, host: str, port: int, scan_interval: int, ping_host: str | None, check_status_first: bool = True) -> None:
+    def __init__(self, hass: HomeAssistant, name: str, host: str, port: int, scan_interval: int, ping_host: str | None, check_status_first: bool = True,
+                 fast_poll: bool = DEFAULT_FAST_POLL, fast_scan_interval: int = DEFAULT_FAST_SCAN_INTERVAL,
+                 unit_id: int = DEFAULT_UNIT_ID, heartbeat_interval: int = DEFAULT_HEARTBEAT_INTERVAL,
+                 adaptive_polling: bool = DEFAULT_ADAPTIVE_POLLING, min_scan_interval: int = DEFAULT_MIN_SCAN_INTERVAL,
+                 max_scan_interval: int = DEFAULT_MAX_SCAN_INTERVAL, night_mode: bool = DEFAULT_NIGHT_MODE,
+                 rtc_drift_threshold: int = DEFAULT_RTC_DRIFT_THRESHOLD, entry_id: str | None = None,
+                 sample_buffer_depth: int = DEFAULT_SAMPLE_BUFFER_DEPTH) -> None:
         """Initialize the SolarMax Modbus hub."""
         super().__init__(
             hass,
             _LOGGER,
             name=name,
-            update_interval=timedelta(seconds=scan_interval),
+            update_interval=None,  # Polls are driven by the shared SolarMaxPollScheduler
             update_method=self._async_update_data,
         )
         self._host = host
@@ -37,117 +89,398 @@ class SolarMaxModbusHub(DataUpdateCoordinator[dict[str, Any]]):
         self._ping_host = ping_host
         self._check_status_first = check_status_first
         self._ping_host_reachable = False
+        # Adaptive polling: current interval between min and max scan interval
+        self._adaptive_polling = adaptive_polling
+        self._min_scan_interval = min_scan_interval
+        self._max_scan_interval = max_scan_interval
+        self._adaptive_interval = float(min(max(scan_interval, min_scan_interval), max_scan_interval))
+        self._last_power: float | None = None
+        # Night mode: no polls, pings or connects between dusk and dawn
+        self._night_mode = night_mode
+        self.suspended_until: datetime | None = None
         self.inverter_data: dict[str, Any] = {}
+        # Mode changes are sent as SIGNAL_MODE_CHANGED (old mode, new mode)
+        self.signal_mode_changed = SIGNAL_MODE_CHANGED.format(entry_id or name)
+        self._mode: str | None = None
+        self.metrics = HubMetrics()
+        # Keys whose value changed in the last poll, None if all may have changed
+        self.changed_keys: set[str] | None = None
+        self.heartbeat_interval = heartbeat_interval
+        self.rtc_drift_threshold = rtc_drift_threshold
+        # Time each deadband filtered value was last published
+        self._published_at: dict[str, float] = {}
         self._key_dict = {}
-        self._client: AsyncModbusTcpClient # to get rid of the pylance errors
-        self._client = None # type: ignore
-        self._icmp_privileged = hass.data[DOMAIN]["icmp_privileged"]
+        # Unfiltered value of every field per poll, columns set in set_key_dict
+        self.samples = SampleBuffer((), sample_buffer_depth)
+        # Read plans per polled tier set: the hub reads both tiers unless
+        # fast polling is enabled, then the fast coordinator reads TIER_FAST
+        self._read_plans: dict[tuple[str, ...], list[tuple[ReadSpan, DecodePlan]]] = {}
+        self._tiers = (TIER_SLOW,) if fast_poll else (TIER_FAST, TIER_SLOW)
+        self.fast_coordinator: SolarMaxFastCoordinator | None = None
+        if fast_poll:
+            self.fast_coordinator = SolarMaxFastCoordinator(hass, self, fast_scan_interval)
+        self._unit_id = unit_id
+        self._scheduler: SolarMaxPollScheduler = hass.data[DOMAIN]["scheduler"]
+        # Hubs behind the same gateway share one TCP connection
+        self._pool: ModbusConnectionPool = hass.data[DOMAIN]["connection_pool"]
+        self._connection: ModbusConnection = self._pool.acquire(host, port)
+        # Reachability of the ping host is probed in the background
+        self._liveness: LivenessTracker = hass.data[DOMAIN]["liveness"]
+        if ping_host:
+            self._liveness.async_add(ping_host, self)
+
+    @property
+    def poll_interval(self) -> float:
+        """Return the poll interval in seconds used by the scheduler."""
+        if self._adaptive_polling:
+            return self._adaptive_interval
+        return self._scan_interval
+
+    @property
+    def suspended_for(self) -> float:
+        """Return the seconds until night mode ends, the scheduler skips polls until then."""
+        if self.suspended_until is None:
+            return 0.0
+        return max((self.suspended_until - dt_util.utcnow()).total_seconds(), 0.0)
+
+    def _adapt_poll_interval(self, data: dict[str, Any] | None) -> None:
+        """Adjust the adaptive poll interval after a poll.
+
+        Offline or failed polls back off exponentially, idle modes (Standby,
+        Initial Mode) poll at the maximum interval, and OnGrid polls at the
+        minimum interval while AC power changes quickly and slows down while
+        it is stable.
+        """
+        interval = self._adaptive_interval
+        mode = data.get("InverterMode") if data else None
+        power = data.get("Active_Power") if data else None
+        if mode in ADAPTIVE_IDLE_MODES:
+            interval = self._max_scan_interval
+        elif mode != "OnGrid" or power is None:
+            interval *= 2
+        elif self._last_power is not None:
+            change = abs(power - self._last_power) / max(abs(self._last_power), ADAPTIVE_MIN_POWER)
+            if change > ADAPTIVE_FAST_CHANGE:
+                interval = self._min_scan_interval
+            elif change < ADAPTIVE_STABLE_CHANGE:
+                interval *= 1.5
+        self._last_power = power
+        interval = min(max(interval, self._min_scan_interval), self._max_scan_interval)
+        if interval != self._adaptive_interval:
+            _LOGGER.debug(f"Adaptive poll interval {self._adaptive_interval:.1f}s -> {interval:.1f}s ({mode})")
+            self._adaptive_interval = interval
+            self._scheduler.async_interval_changed(self)
 
     async def start_coordinator(self) -> None:
-        """Ensure the coordinators are running and scheduled."""
+        """Ensure the coordinators are scheduled and start their first poll.
+
+        The first polls run in the background, setup does not wait for them.
+        """
         _LOGGER.info("Starting main coordinator scheduling... ")
-        try:
-            await self.async_request_refresh()
-            _LOGGER.info("Main coordinator refresh requested")
-        except Exception as e:
-            _LOGGER.error(f"Failed to request main coordinator refresh: {e}")
+        self._scheduler.async_add(self)
+        self._scheduler.async_poll_now(self)
+        if self.fast_coordinator is not None:
+            self._scheduler.async_add(self.fast_coordinator)
+            self._scheduler.async_poll_now(self.fast_coordinator)
 
-    async def _async_host_alive(self, host) -> bool:
-        """Ping host to check if alive."""
-        _LOGGER.debug("ping address: %s", self._ping_host)
-        try:
-            data = await async_ping(
-                host,
-                count=1,
-                timeout=1,
-                privileged=self._icmp_privileged,
-            )
-        except NameLookupError as error:
-            _LOGGER.info("Error resolving host: %s", self._ping_host)
-            self._ping_host_reachable = False
-            raise error from None
-        return data.is_alive
+    async def async_stop(self) -> None:
+        """Stop polling and close the Modbus connection."""
+        polls = [self._scheduler.async_remove(self)]
+        if self.fast_coordinator is not None:
+            polls.append(self._scheduler.async_remove(self.fast_coordinator))
+        # A cancelled poll waiting for the host slot would otherwise reconnect
+        # the connection after it was released
+        if polls := [poll for poll in polls if poll is not None]:
+            await asyncio.gather(*polls, return_exceptions=True)
+        self._pool.release(self._connection)
+        if self._ping_host:
+            self._liveness.async_remove(self._ping_host, self)
+
+    @property
+    def connection(self) -> ModbusConnection:
+        """Return the (shared) Modbus connection of the hub."""
+        return self._connection
+
+    @property
+    def fast_poll(self) -> bool:
+        """Return True if the fast tier is polled by its own coordinator."""
+        return self.fast_coordinator is not None
+
+    def coordinator_for_tier(self, tier: str) -> DataUpdateCoordinator[dict[str, Any]]:
+        """Return the coordinator that polls and notifies a tier."""
+        if tier == TIER_FAST and self.fast_coordinator is not None:
+            return self.fast_coordinator
+        return self
+
+    def _host_alive(self, host) -> bool | None:
+        """Return the cached liveness of host, None if unknown.
+
+        An unknown host is probed in the background, the poll does not wait
+        for the ping and reads the inverter right away.
+        """
+        alive = self._liveness.is_alive(host)
+        if alive is None:
+            # Not probed yet or the cached result expired
+            if (probe := self._liveness.async_request_probe(host)) is not None:
+                _LOGGER.debug("ping address: %s", host)
+                start = time.perf_counter()
+                probe.add_done_callback(
+                    lambda _: self.metrics.ping_duration.observe((time.perf_counter() - start) * 1000)
+                )
+        else:
+            self.metrics.ping_cache_hits += 1
+        return alive
 
     async def _async_maintain_connection(self):
         """Maintain the connection."""
-        if self._client is None:
-            self._client = AsyncModbusTcpClient(host=self._host, port=self._port, timeout=3, retries=1)
-        if not self._client.connected:
-            _LOGGER.info(f"Connecting to Modbus client at {self._host}:{self._port}...")
-            try:
-                await self._client.connect()
-            except Exception as e:
-                _LOGGER.warning(f"connection error {e}")
-            if not self._client.connected:
-                _LOGGER.error(f"Failed to connect to Modbus client at {self._host}:{self._port}")
-                raise ConnectionError(f"Failed to connect to {self._host}:{self._port}")
-            _LOGGER.info(f"Connected to Modbus client at {self._host}:{self._port}")
+        if self._connection.connected:
+            return
+        try:
+            await self._connection.async_connect()
+        except CircuitOpenError:
+            self.metrics.circuit_rejections += 1
+            raise
+        except ConnectionError:
+            self.metrics.connect_attempts += 1
+            self.metrics.connect_failures += 1
+            raise
+        self.metrics.connect_attempts += 1
+
+    async def async_read_registers(self, address: int, count: int):
+        """Read holding registers outside of a poll (history, serial number)."""
+        async with self._scheduler.transaction(self._host):
+            await self._async_maintain_connection()
+            return await self._connection.read_holding_registers(address, count, self._unit_id)
+
+    async def async_write_register(self, address: int, value: int):
+        """Write a single holding register."""
+        async with self._scheduler.transaction(self._host):
+            await self._async_maintain_connection()
+            return await self._connection.write_register(address, value, self._unit_id)
+
+    async def async_write_registers(self, address: int, values: list[int]):
+        """Write consecutive holding registers in one request."""
+        async with self._scheduler.transaction(self._host):
+            await self._async_maintain_connection()
+            return await self._connection.write_registers(address, values, self._unit_id)
+
+    def night_suspended(self) -> bool:
+        """Return True if polling is suspended for the night.
+
+        The night lasts from NIGHT_MODE_DUSK_OFFSET after sunset until
+        NIGHT_MODE_DAWN_WINDOW before sunrise, when polling resumes to probe
+        for the inverter waking up.
+        """
+        if not self._night_mode:
+            return False
+        now = dt_util.utcnow()
+        try:
+            dawn = get_astral_event_next(self.hass, SUN_EVENT_SUNRISE, now, -NIGHT_MODE_DAWN_WINDOW)
+            dusk = get_astral_event_next(self.hass, SUN_EVENT_SUNSET, now, NIGHT_MODE_DUSK_OFFSET)
+        except ValueError:
+            # No sunrise or sunset at this location and date (polar day/night)
+            dawn = None
+        if dawn is None or dusk < dawn:
+            if self.suspended_until is not None:
+                _LOGGER.info(f"Night mode: resuming polling of {self.name}")
+                self.suspended_until = None
+            return False
+        if self.suspended_until != dawn:
+            _LOGGER.info(f"Night mode: suspending polling of {self.name} until {dt_util.as_local(dawn)}")
+            self.suspended_until = dawn
+            self._scheduler.async_interval_changed(self)
+            if self.fast_coordinator is not None:
+                self._scheduler.async_interval_changed(self.fast_coordinator)
+        return True
+
+    @callback
+    def _publish_mode(self, data: dict[str, Any]) -> None:
+        """Signal a change of the inverter mode to subscribers."""
+        mode = data.get("InverterMode")
+        if mode == self._mode:
+            return
+        previous, self._mode = self._mode, mode
+        _LOGGER.debug(f"Inverter mode of {self.name} changed: {previous} -> {mode}")
+        async_dispatcher_send(self.hass, self.signal_mode_changed, previous, mode)
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Regular poll cycle: read fresh values."""
-        _LOGGER.debug("Regular poll cycle")
-        if self._ping_host != "":
-            _LOGGER.debug("ping address: %s", self._ping_host)
+        if self.night_suspended():
+            # Only the first suspended poll replaces the data, later ones
+            # change nothing and write no states
+            self.changed_keys = set() if self.data == {"InverterMode": "offline"} else None
+            self._publish_mode({"InverterMode": "offline"})
+            return {"InverterMode": "offline"}
+        try:
+            data, self.changed_keys = await self.async_poll_tiers(self._tiers, self.data)
+        except Exception:
+            if self._adaptive_polling:
+                self._adapt_poll_interval(None)
+            raise
+        if self._adaptive_polling:
+            self._adapt_poll_interval(data)
+        return data
+
+    async def async_poll_tiers(self, tiers: tuple[str, ...], previous: dict[str, Any] | None) -> tuple[dict[str, Any], set[str] | None]:
+        """Read the given tiers and return the data with the keys that changed.
+
+        The changed keys are None if the data was replaced as a whole, e.g.
+        when the inverter went offline or came back.
+        """
+        changed: set[str] = set()
+        start = time.perf_counter()
+        data = await self._async_read_tiers(tiers, changed)
+        self.metrics.polls += 1
+        self.metrics.poll_duration.observe((time.perf_counter() - start) * 1000)
+        self._publish_mode(data)
+        if data is not previous and data != previous:
+            return data, None
+        return data, changed
+
+    async def _async_read_tiers(self, tiers: tuple[str, ...], changed: set[str]) -> dict[str, Any]:
+        """Read and decode the read spans of the given tiers."""
+        _LOGGER.debug(f"Regular poll cycle {tiers}")
+        if self._ping_host:
             try:
-                self._ping_host_reachable = await self._async_host_alive(
-                    self._ping_host
-                )
+                alive = self._host_alive(self._ping_host)
             except NameLookupError:
                 _LOGGER.info("Error resolving host: %s", self._ping_host)
                 self._ping_host_reachable = False
                 return {"InverterMode": "Resolve Error"}
+            # Unknown liveness: read anyway, a failed read reports offline
+            self._ping_host_reachable = alive is not False
             if not self._ping_host_reachable:
                 return {"InverterMode": "offline"}
-        await self._async_maintain_connection()
-        try:
-            regs = await self._client.read_holding_registers(4097, count=60)
-            if regs.isError():
-                _LOGGER.error("Error reading full register range")
-                return self.inverter_data  # Return existing data
-        except Exception as e:
-            _LOGGER.error(f"Error reading holding registers: {e}")
-            return self.inverter_data  # Return existing data
-        
-        _LOGGER.debug(f"Read {len(regs.registers)} registers from active inverter")
-        
-        # Process all registers
-        for offset in range(len(regs.registers)):
-            if offset in self._key_dict:
-                key = self._key_dict[offset]["key"]
-                data_type: str = self._key_dict[offset]["type"]
-                if data_type.startswith("STATUS"):
-                    q = self._client.convert_from_registers(regs.registers[offset:offset+1], self._client.DATATYPE.UINT16)
-                    t = getattr(_const, data_type)
-                    if t and q in t:
-                        self.inverter_data[key] = t[q]
-                    else:
-                        self.inverter_data[key] = f"unknown {q}"
+        now = time.monotonic()
+        row = self.samples.new_row() if self.samples.depth else None
+        async with self._scheduler.transaction(self._host):
+            try:
+                await self._async_maintain_connection()
+            except CircuitOpenError as e:
+                _LOGGER.debug(f"Skipping poll of {self.name}: {e}")
+                return {"InverterMode": "offline"}
+            decoded = 0
+            for span, plan in self._read_plans.get(tiers, []):
+                try:
+                    regs = await self._connection.read_holding_registers(span.address, span.count, self._unit_id)
+                    if regs.isError():
+                        self.metrics.modbus_exceptions += 1
+                        _LOGGER.error(f"Error reading register range {span.address}-{span.address + span.count - 1}")
+                        return self.inverter_data  # Return existing data
+                except Exception as e:
+                    self.metrics.errors[type(e).__name__] += 1
+                    _LOGGER.error(f"Error reading holding registers: {e}")
+                    return self.inverter_data  # Return existing data
+
+                _LOGGER.debug(f"Read {len(regs.registers)} registers at {span.address} from active inverter")
+
+                # Decode with the plan compiled in set_key_dict
+                self.metrics.bytes_read += 2 * len(regs.registers)
+                start = time.perf_counter()
+                try:
+                    plan.decode(regs.registers, self.inverter_data, changed, self._published_at, now, row)
+                except struct.error as e:
+                    _LOGGER.error(f"Unexpected register block size {len(regs.registers)}: {e}")
                 else:
-                    factor = self._key_dict[offset]["factor"]
-                    t = getattr(self._client.DATATYPE, data_type)
-                    data_len = t.value[1]
-                    r = self._client.convert_from_registers(regs.registers[offset:offset + data_len], t)
-                    self.inverter_data[key] = r * factor
+                    decoded += 1
+                self.metrics.decode_duration.observe((time.perf_counter() - start) * 1000)
+        if not decoded:
+            # No register map yet or no block decoded, nothing proves success
+            return self.inverter_data
+        self.metrics.last_success = time.time()
+        if row is not None:
+            self.samples.append(self.metrics.last_success, row)
+        if self._ping_host:
+            # A successful read proves the inverter is alive, no ping needed
+            self._liveness.mark_alive(self._ping_host)
         return self.inverter_data
 
-    async def update_runtime_settings(self, scan_interval: int, ping_host:str | None, check_status_first: bool = True) -> None:
+    async def update_runtime_settings(self, scan_interval: int, ping_host:str | None, check_status_first: bool = True,
+                                      fast_scan_interval: int = DEFAULT_FAST_SCAN_INTERVAL,
+                                      heartbeat_interval: int = DEFAULT_HEARTBEAT_INTERVAL,
+                                      adaptive_polling: bool = DEFAULT_ADAPTIVE_POLLING,
+                                      min_scan_interval: int = DEFAULT_MIN_SCAN_INTERVAL,
+                                      max_scan_interval: int = DEFAULT_MAX_SCAN_INTERVAL,
+                                      night_mode: bool = DEFAULT_NIGHT_MODE,
+                                      rtc_drift_threshold: int = DEFAULT_RTC_DRIFT_THRESHOLD,
+                                      sample_buffer_depth: int = DEFAULT_SAMPLE_BUFFER_DEPTH) -> None:
         """Update settings."""
         _LOGGER.info("Update settings")
         self._scan_interval = scan_interval
-        self._ping_host = ping_host
+        self.heartbeat_interval = heartbeat_interval
+        self.rtc_drift_threshold = rtc_drift_threshold
+        self.samples.resize(sample_buffer_depth)
+        self._adaptive_polling = adaptive_polling
+        self._min_scan_interval = min_scan_interval
+        self._max_scan_interval = max_scan_interval
+        self._adaptive_interval = float(min(max(scan_interval, min_scan_interval), max_scan_interval))
+        self._night_mode = night_mode
+        if not night_mode:
+            self.suspended_until = None
+        self._scheduler.async_reschedule(self)
+        if self.fast_coordinator is not None:
+            self.fast_coordinator.set_poll_interval(fast_scan_interval)
+        self._set_ping_host(ping_host)
         self._check_status_first = check_status_first
 
-    async def reconfigure_connection_settings(self, host: str, port: int, scan_interval: int, ping_host:str | None, check_status_first: bool = True) -> None:
-        """Update settings."""
-        _LOGGER.info("Update settings")
-        self._host = host
-        self._port = port
-        self._scan_interval = scan_interval
+    def _set_ping_host(self, ping_host: str | None) -> None:
+        """Move liveness tracking to a new ping host."""
+        if ping_host == self._ping_host:
+            return
+        if self._ping_host:
+            self._liveness.async_remove(self._ping_host, self)
+        if ping_host:
+            self._liveness.async_add(ping_host, self)
         self._ping_host = ping_host
+
+    async def reconfigure_connection_settings(self, host: str, port: int, scan_interval: int, ping_host:str | None, check_status_first: bool = True,
+                                              unit_id: int = DEFAULT_UNIT_ID) -> None:
+        """Update connection settings without reloading the entry.
+
+        A new host or port swaps the pooled connection once the requests
+        in flight on the old one are done. The reconfigure flow reloads the
+        entry instead if host or unit id change, as they may address
+        another inverter.
+        """
+        _LOGGER.info("Update connection settings")
+        if (host, port) != (self._host, self._port):
+            old_connection = self._connection
+            async with self._scheduler.transaction(self._host):
+                self._connection = self._pool.acquire(host, port)
+                self._host = host
+                self._port = port
+            self._pool.release(old_connection)
+            _LOGGER.info(f"{self.name} now connects to {host}:{port}")
+        self._unit_id = unit_id
+        self._scan_interval = scan_interval
+        self._adaptive_interval = float(min(max(scan_interval, self._min_scan_interval), self._max_scan_interval))
+        self._scheduler.async_reschedule(self)
+        self._set_ping_host(ping_host)
         self._check_status_first = check_status_first
 
     def set_key_dict(self, key_dict):
-        """Set mapping between register position and variable."""
+        """Set mapping between register address and variable.
+
+        The mapping is split into contiguous read spans per polled tier set,
+        each compiled once into a decode plan so that a poll is a single
+        struct unpack per span followed by a scale pass. The sample buffer
+        gets one column per field, in register order.
+        """
+        keys = tuple(key_dict[address]["key"] for address in sorted(key_dict))
+        if keys != self.samples.keys:
+            self.samples = SampleBuffer(keys, self.samples.depth)
+        read_plans = {}
+        for tiers in {self._tiers, (TIER_FAST,)}:
+            read_plans[tiers] = []
+            for span in compute_read_spans(key_dict, tiers):
+                span_keys = {
+                    address - span.address: entry
+                    for address, entry in key_dict.items()
+                    if span.address <= address < span.address + span.count and entry["tier"] in tiers
+                }
+                read_plans[tiers].append((span, compile_decode_plan(span_keys, span.count, self.samples.columns)))
+            _LOGGER.debug(f"Reading {tiers} in spans {[(s.address, s.count) for s, _ in read_plans[tiers]]}")
+        self._read_plans = read_plans
         self._key_dict = key_dict
 
     async def async_read_serial_number(self) -> tuple[str | None, str | None]:
@@ -157,10 +490,8 @@ class SolarMaxModbusHub(DataUpdateCoordinator[dict[str, Any]]):
             tuple: (serial_number, model) or (None, None) if reading fails
         """
         try:
-            await self._async_maintain_connection()
-            
             # Read serial number from registers 6672-6678 (7 registers)
-            sn_data = await self._client.read_holding_registers(6672, count=7)
+            sn_data = await self.async_read_registers(6672, 7)
 
             if sn_data.isError():
                 _LOGGER.warning("Could not read serial number from registers 6672-6678")
@@ -201,10 +532,50 @@ class SolarMaxModbusHub(DataUpdateCoordinator[dict[str, Any]]):
             return None, None
 
 
+class SolarMaxFastCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Coordinator polling the fast tier (power, current, mode) of a hub."""
+
+    def __init__(self, hass: HomeAssistant, hub: SolarMaxModbusHub, scan_interval: int) -> None:
+        """Initialize the fast coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{hub.name}_fast",
+            update_interval=None,  # Polls are driven by the shared SolarMaxPollScheduler
+        )
+        self._hub = hub
+        self._scan_interval = scan_interval
+        self.changed_keys: set[str] | None = None
+
+    @property
+    def poll_interval(self) -> float:
+        """Return the poll interval in seconds used by the scheduler."""
+        return self._scan_interval
+
+    @property
+    def suspended_for(self) -> float:
+        """Return the seconds until night mode of the hub ends."""
+        return self._hub.suspended_for
+
+    def set_poll_interval(self, scan_interval: int) -> None:
+        """Change the fast poll interval."""
+        self._scan_interval = scan_interval
+        self._hub._scheduler.async_reschedule(self)
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fast poll cycle: read only the fast tier."""
+        if self._hub.night_suspended():
+            self.changed_keys = set() if self.data == {"InverterMode": "offline"} else None
+            self._hub._publish_mode({"InverterMode": "offline"})
+            return {"InverterMode": "offline"}
+        data, self.changed_keys = await self._hub.async_poll_tiers((TIER_FAST,), self.data)
+        return data
+
+
 class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     """Coordinator for reading historical data from SolarMax inverter."""
     
-    def __init__(self, hass: HomeAssistant, hub: SolarMaxModbusHub) -> None:
+    def __init__(self, hass: HomeAssistant, hub: SolarMaxModbusHub, entry_id: str) -> None:
         """Initialize the history coordinator."""
         super().__init__(
             hass,
@@ -214,19 +585,25 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         )
         self._hub = hub
         self._last_import_date = None
-        self._imported_dates = set()  # Track which dates we've already imported
-        # Import when inverter is online (check inverter status)
-        # Will import when inverter mode changes from offline to online
-        self._last_inverter_status = None
-        self._scheduled_update = None
+        # Dates already imported with the fingerprint and hourly values of
+        # their raw registers, persisted so a restart does not re-read all
+        # 30 days and unchanged days or hours are not imported again
+        self._imported_dates: dict[str, dict[str, Any]] = {}
+        # Newest imported date, it and later days are read again because they
+        # may have been imported before the inverter finished them
+        self._watermark: str | None = None
+        self._store: Store[dict[str, Any]] = Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}")
+        # Import when inverter mode changes from offline to online
+        self._unsub_mode_changed = None
+        self._online_task: asyncio.Task | None = None
     
     async def async_start(self) -> None:
         """Start the coordinator with automatic updates."""
+        await self._async_load_import_state()
+
         # Do first update immediately if inverter is online
         inverter_mode = self._hub.inverter_data.get("InverterMode", "unknown")
-        # Online states: OnGrid, Standby, Initial Mode
-        online_states = ["OnGrid", "Standby", "Initial Mode"]
-        if inverter_mode in online_states:
+        if inverter_mode in ONLINE_MODES:
             _LOGGER.info(f"Inverter is online ({inverter_mode})")
             # First: Sync RTC to ensure correct timestamps
             try:
@@ -239,80 +616,169 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         else:
             _LOGGER.info(f"Inverter is offline ({inverter_mode}), history import will run when inverter comes online")
         
-        # Start monitoring inverter status
-        self._start_status_monitoring()
+        # Follow the mode changes of the hub
+        self._unsub_mode_changed = async_dispatcher_connect(
+            self.hass, self._hub.signal_mode_changed, self._async_mode_changed
+        )
+
+    async def async_stop(self) -> None:
+        """Stop following the hub and cancel a running import."""
+        if self._unsub_mode_changed is not None:
+            self._unsub_mode_changed()
+            self._unsub_mode_changed = None
+        if self._online_task is not None and not self._online_task.done():
+            self._online_task.cancel()
     
-    def _start_status_monitoring(self) -> None:
-        """Monitor inverter status and import when it comes online."""
-        async def check_status():
-            """Check inverter status periodically."""
-            while True:
-                await asyncio.sleep(60)  # Check every minute
-                
-                current_status = self._hub.inverter_data.get("InverterMode", "unknown")
-                
-                # Offline/error states
-                offline_states = ["offline", "Resolve Error", "Shutdown", "Error"]
-                # Online states
-                online_states = ["OnGrid", "Standby", "Initial Mode"]
-                
-                # If inverter just came online (was offline, now online)
-                if (self._last_inverter_status in offline_states or self._last_inverter_status is None) and current_status in online_states:
-                    _LOGGER.info(f"Inverter came online (status: {current_status})")
-                    
-                    # Sync inverter RTC (Real Time Clock) first
-                    try:
-                        await self._sync_inverter_rtc()
-                    except Exception as e:
-                        _LOGGER.error(f"Failed to sync inverter RTC: {e}")
-                    
-                    # Check if we already imported today
-                    today = datetime.now().strftime('%Y-%m-%d')
-                    if today not in self._imported_dates:
-                        _LOGGER.info("Starting history import")
-                        await self.async_refresh()
-                
-                self._last_inverter_status = current_status
+    async def _async_load_import_state(self) -> None:
+        """Load the import watermark and day fingerprints from storage."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        self._imported_dates = stored.get("days", {})
+        self._watermark = stored.get("watermark")
+        if stored.get("last_import"):
+            self._last_import_date = datetime.fromisoformat(stored["last_import"])
+        _LOGGER.debug(f"Loaded history import state: {len(self._imported_dates)} days, watermark {self._watermark}")
+
+    async def _async_save_import_state(self, today: datetime) -> None:
+        """Persist the import state, forgetting days the inverter no longer holds."""
+        oldest = (today - timedelta(days=HISTORY_DAYS - 1)).strftime('%Y-%m-%d')
+        self._imported_dates = {date_str: day for date_str, day in self._imported_dates.items() if date_str >= oldest}
+        await self._store.async_save({
+            "watermark": self._watermark,
+            "days": self._imported_dates,
+            "last_import": self._last_import_date.isoformat() if self._last_import_date else None,
+        })
+
+    @callback
+    def _async_mode_changed(self, previous: str | None, mode: str | None) -> None:
+        """Sync the RTC and import history when the inverter came online."""
+        if (previous is None or previous in OFFLINE_MODES) and mode in ONLINE_MODES:
+            _LOGGER.info(f"Inverter came online (status: {mode})")
+            if self._online_task is None or self._online_task.done():
+                self._online_task = self.hass.async_create_background_task(
+                    self._async_came_online(), f"{self.name} came online"
+                )
+
+    async def _async_came_online(self) -> None:
+        """Sync the RTC, then import history unless already done today."""
+        # Sync inverter RTC (Real Time Clock) first
+        try:
+            await self._sync_inverter_rtc()
+        except Exception as e:
+            _LOGGER.error(f"Failed to sync inverter RTC: {e}")
         
-        # Start monitoring task
-        self.hass.async_create_task(check_status())
+        # Check if we already imported today
+        today = datetime.now().strftime('%Y-%m-%d')
+        if today not in self._imported_dates:
+            _LOGGER.info("Starting history import")
+            await self.async_refresh()
     
     async def _sync_inverter_rtc(self) -> None:
-        """Synchronize inverter's Real Time Clock with system time."""
-        _LOGGER.info("Synchronizing inverter RTC with system time")
-        
+        """Synchronize inverter's Real Time Clock with system time.
+
+        The clock is read first and only written if it drifted by more than
+        the configured threshold, then all four registers are set in a
+        single request so the time cannot be torn between them.
+        """
         try:
+            regs = await self._hub.async_read_registers(RTC_ADDRESS, RTC_REGISTERS)
+            if regs.isError():
+                _LOGGER.warning("Could not read inverter RTC, setting it anyway")
+            else:
+                now = datetime.now()
+                try:
+                    year, month_day, hour_minute, second = regs.registers
+                    inverter_time = datetime(
+                        year, month_day >> 8, month_day & 0xFF, hour_minute >> 8, hour_minute & 0xFF, second & 0xFF
+                    )
+                except ValueError:
+                    _LOGGER.warning(f"Inverter RTC holds an invalid time {regs.registers}")
+                else:
+                    drift = (inverter_time - now).total_seconds()
+                    if abs(drift) <= self._hub.rtc_drift_threshold:
+                        _LOGGER.debug(f"Inverter RTC is off by {drift:.0f}s, no sync needed")
+                        self._hub.metrics.rtc_syncs["in_sync"] += 1
+                        return
+                    _LOGGER.info(f"Inverter RTC is off by {drift:.0f}s")
+
+            _LOGGER.info("Synchronizing inverter RTC with system time")
             now = datetime.now()
-            
-            # Register 12288: Year
-            await self._hub._client.write_register(12288, now.year)
-            _LOGGER.debug(f"Wrote year: {now.year}")
-            
-            # Register 12289: Month (high byte) + Day (low byte)
-            month_day = (now.month * 256) + now.day
-            await self._hub._client.write_register(12289, month_day)
-            _LOGGER.debug(f"Wrote month/day: {now.month}/{now.day}")
-            
-            # Register 12290: Hour (high byte) + Minute (low byte)
-            hour_minute = (now.hour * 256) + now.minute
-            await self._hub._client.write_register(12290, hour_minute)
-            _LOGGER.debug(f"Wrote hour/minute: {now.hour}:{now.minute}")
-            
-            # Register 12291: 45 (high byte) + Second (low byte)
-            # Note: 45 seems to be a constant, keeping it as in original script
-            second_value = (45 * 256) + now.second
-            await self._hub._client.write_register(12291, second_value)
-            _LOGGER.debug(f"Wrote second: {now.second}")
+            result = await self._hub.async_write_registers(RTC_ADDRESS, [
+                now.year,
+                # Month (high byte) + Day (low byte)
+                (now.month * 256) + now.day,
+                # Hour (high byte) + Minute (low byte)
+                (now.hour * 256) + now.minute,
+                # 45 (high byte) + Second (low byte)
+                # Note: 45 seems to be a constant, keeping it as in original script
+                (45 * 256) + now.second,
+            ])
+            if result.isError():
+                raise ConnectionError(f"Inverter rejected RTC write: {result}")
             
             _LOGGER.info(f"Successfully synced inverter RTC to {now.strftime('%Y-%m-%d %H:%M:%S')}")
+            self._hub.metrics.rtc_syncs["written"] += 1
             
         except Exception as e:
+            self._hub.metrics.rtc_syncs["failed"] += 1
             _LOGGER.error(f"Error syncing inverter RTC: {e}")
             raise
         
+    async def _async_read_history(self, day_offsets: list[int]) -> dict[int, list[int]]:
+        """Read the raw 48-register blocks of the given day offsets.
+
+        Each run of consecutive days is read in chunks of up to 125 registers
+        instead of one request per day. Days touched by a failed chunk are
+        re-read one by one.
+        """
+        # Split into runs of consecutive day offsets
+        runs: list[list[int]] = []
+        for day_offset in sorted(day_offsets):
+            if runs and day_offset == runs[-1][-1] + 1:
+                runs[-1].append(day_offset)
+            else:
+                runs.append([day_offset])
+
+        day_blocks: dict[int, list[int]] = {}
+        for run in runs:
+            start = HISTORY_ADDRESS + run[0] * HISTORY_DAY_REGISTERS
+            window: list[int | None] = [None] * (len(run) * HISTORY_DAY_REGISTERS)
+            for offset in range(0, len(window), MAX_READ_REGISTERS):
+                count = min(MAX_READ_REGISTERS, len(window) - offset)
+                try:
+                    regs = await self._hub.async_read_registers(start + offset, count)
+                    if regs.isError() or len(regs.registers) != count:
+                        _LOGGER.warning(f"Error reading historical registers {start + offset}-{start + offset + count - 1}")
+                        continue
+                except Exception as e:
+                    _LOGGER.warning(f"Error reading historical registers {start + offset}-{start + offset + count - 1}: {e}")
+                    continue
+                window[offset:offset + count] = regs.registers
+
+            for index, day_offset in enumerate(run):
+                block = window[index * HISTORY_DAY_REGISTERS:(index + 1) * HISTORY_DAY_REGISTERS]
+                if None in block:
+                    block = await self._async_read_history_day(day_offset)
+                if block is not None:
+                    day_blocks[day_offset] = block
+        return day_blocks
+
+    async def _async_read_history_day(self, day_offset: int) -> list[int] | None:
+        """Read the 48 history registers of a single day (fallback)."""
+        start_addr = HISTORY_ADDRESS + day_offset * HISTORY_DAY_REGISTERS
+        try:
+            regs = await self._hub.async_read_registers(start_addr, HISTORY_DAY_REGISTERS)
+            if regs.isError():
+                return None
+        except Exception as e:
+            _LOGGER.error(f"Error reading historical data for day offset {day_offset}: {e}")
+            return None
+        return regs.registers
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Read historical data and import to HA statistics."""
         _LOGGER.info("Reading historical data from inverter")
+        started = time.perf_counter()
         
         try:
             await self._hub._async_maintain_connection()
@@ -337,12 +803,12 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             days_to_import = []
             
             # Check all 30 days available in the inverter
-            for day_offset in range(30):
+            for day_offset in range(HISTORY_DAYS):
                 date = today - timedelta(days=day_offset)
                 date_str = date.strftime('%Y-%m-%d')
                 
-                # Import if: first run OR date not yet imported OR within last 2 days (always refresh recent data)
-                if not self._imported_dates or date_str not in self._imported_dates or day_offset < 2:
+                # Import if: first run OR date not yet imported OR not older than the watermark
+                if self._watermark is None or date_str not in self._imported_dates or date_str >= self._watermark:
                     days_to_import.append(day_offset)
             
             if not self._imported_dates:
@@ -350,18 +816,20 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             else:
                 _LOGGER.info(f"Daily update: importing {len(days_to_import)} days (including catch-up for missed days)")
             
+            # Read all requested days in as few bulk requests as possible
+            day_blocks = await self._async_read_history(days_to_import)
+            unchanged_days = 0
+            state_changed = False
+
             for day_offset in days_to_import:
-                # Calculate register address for this day
-                start_addr = 49152 + (day_offset * 48)
-                
                 try:
-                    regs = await self._hub._client.read_holding_registers(start_addr, count=48)
-                    if regs.isError():
+                    regs = day_blocks.get(day_offset)
+                    if regs is None:
                         _LOGGER.warning(f"Error reading historical data for day offset {day_offset}")
                         continue
                     
                     # First register (index 0) contains day of month (1-31)
-                    day_of_month = regs.registers[0]
+                    day_of_month = regs[0]
                     
                     # Calculate expected date: offset 0 = today, offset 1 = yesterday, etc.
                     date = today - timedelta(days=day_offset)
@@ -378,24 +846,36 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     
                     date_str = date.strftime('%Y-%m-%d')
                     
-                    # Extract every 2nd register starting from index 1, divide by 100
-                    hourly_values = [regs.registers[i] / 100.0 for i in range(1, 48, 2)]
+                    # Skip days whose registers did not change since the last import
+                    fingerprint = _history_fingerprint(regs)
+                    previous = self._imported_dates.get(date_str)
+                    if previous is not None and previous["hash"] == fingerprint:
+                        unchanged_days += 1
+                        continue
+                    
+                    # Extract every 2nd register starting from index 1
+                    hourly_raw = regs[1::2]
+                    previous_raw = previous["hours"] if previous is not None else None
                     
-                    # Create statistics for each hour
-                    for hour in range(24):
-                        if hour < len(hourly_values):
-                            timestamp = date + timedelta(hours=hour)
-                            value = hourly_values[hour]
-                            
-                            all_statistics.append({
-                                "start": timestamp,
-                                "state": value,
-                                "sum": value,
-                            })
+                    # Create statistics for each hour that changed, divide by 100
+                    for hour, raw in enumerate(hourly_raw):
+                        if previous_raw is not None and previous_raw[hour] == raw:
+                            continue
+                        timestamp = date + timedelta(hours=hour)
+                        value = raw / 100.0
+                        
+                        all_statistics.append({
+                            "start": timestamp,
+                            "state": value,
+                            "sum": value,
+                        })
                     
                     # Mark this date as imported
-                    self._imported_dates.add(date_str)
-                    _LOGGER.debug(f"Processed day {date_str}: {sum(hourly_values):.2f} kWh")
+                    self._imported_dates[date_str] = {"hash": fingerprint, "hours": list(hourly_raw)}
+                    state_changed = True
+                    if self._watermark is None or date_str > self._watermark:
+                        self._watermark = date_str
+                    _LOGGER.debug(f"Processed day {date_str}: {sum(hourly_raw) / 100.0:.2f} kWh")
                     
                 except Exception as e:
                     _LOGGER.error(f"Error processing day offset {day_offset}: {e}")
@@ -406,6 +886,16 @@ class SolarMaxHistoryCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 _LOGGER.info(f"Importing {len(all_statistics)} historical statistics to Home Assistant")
                 async_import_statistics(self.hass, metadata, all_statistics)
                 self._last_import_date = datetime.now()
+                state_changed = True
+            # Persist new fingerprints even without changed hours, otherwise
+            # those days are read again after every restart
+            if state_changed:
+                await self._async_save_import_state(today)
+            if unchanged_days:
+                _LOGGER.info(f"Skipped {unchanged_days} unchanged days")
+            self._hub.metrics.history_imports += 1
+            self._hub.metrics.history_rows += len(all_statistics)
+            self._hub.metrics.history_duration.observe((time.perf_counter() - started) * 1000)
                 
             return {
                 "statistics_imported": len(all_statistics),
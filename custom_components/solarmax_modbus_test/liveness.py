@@ -0,0 +1,157 @@
+"""Background liveness probing of the ping hosts of all hubs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from icmplib import NameLookupError, async_multiping, async_ping
+
+from .const import DOMAIN, LIVENESS_PROBE_INTERVAL, LIVENESS_TTL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _HostState:
+    """Cached liveness of one host."""
+
+    owners: set[Any] = field(default_factory=set)
+    alive: bool | None = None
+    resolve_error: bool = False
+    checked: float = 0.0
+    probe: asyncio.Task | None = None  # Probe requested by a poll
+
+
+class LivenessTracker:
+    """Cache the reachability of ping hosts, probed in the background.
+
+    All hosts due for a probe are pinged together with one multi-host ping
+    every LIVENESS_PROBE_INTERVAL seconds. Results stay valid for
+    LIVENESS_TTL seconds, and a successful Modbus read counts as proof of
+    liveness, so polls only read the cache and request a probe in the
+    background if it has no valid result. Hosts whose owners are all
+    suspended for the night are not probed.
+    """
+
+    def __init__(self, hass: HomeAssistant, privileged: bool | None) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self._privileged = privileged
+        self._hosts: dict[str, _HostState] = {}
+        self._unsub: Callable[[], None] | None = None
+
+    @callback
+    def async_add(self, host: str, owner: Any) -> None:
+        """Start tracking host for owner (a hub with suspended_until)."""
+        self._hosts.setdefault(host, _HostState()).owners.add(owner)
+        if self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self.hass, self._async_probe_due, timedelta(seconds=LIVENESS_PROBE_INTERVAL)
+            )
+
+    @callback
+    def async_remove(self, host: str, owner: Any) -> None:
+        """Stop tracking host for owner."""
+        if (state := self._hosts.get(host)) is None:
+            return
+        state.owners.discard(owner)
+        if not state.owners:
+            del self._hosts[host]
+        if not self._hosts and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def mark_alive(self, host: str) -> None:
+        """Record proof of liveness, e.g. a successful Modbus read."""
+        if (state := self._hosts.get(host)) is not None:
+            state.alive = True
+            state.resolve_error = False
+            state.checked = time.monotonic()
+
+    def is_alive(self, host: str) -> bool | None:
+        """Return the cached liveness, None if unknown or expired.
+
+        Raises NameLookupError if the host could not be resolved.
+        """
+        if (state := self._hosts.get(host)) is None:
+            return None
+        if state.resolve_error:
+            raise NameLookupError(host)
+        if time.monotonic() - state.checked > LIVENESS_TTL:
+            return None
+        return state.alive
+
+    async def async_probe(self, host: str) -> bool:
+        """Ping a single host now and cache the result."""
+        state = self._hosts.setdefault(host, _HostState())
+        try:
+            data = await async_ping(host, count=1, timeout=1, privileged=self._privileged)
+        except NameLookupError:
+            _LOGGER.info("Error resolving host: %s", host)
+            state.resolve_error = True
+            raise
+        state.alive = data.is_alive
+        state.resolve_error = False
+        state.checked = time.monotonic()
+        return state.alive
+
+    @callback
+    def async_request_probe(self, host: str) -> asyncio.Task | None:
+        """Probe host in the background unless a probe is running, return the new probe."""
+        state = self._hosts.setdefault(host, _HostState())
+        if state.probe is not None and not state.probe.done():
+            return None
+        state.probe = self.hass.async_create_background_task(
+            self._async_requested_probe(host), f"{DOMAIN} ping {host}"
+        )
+        return state.probe
+
+    async def _async_requested_probe(self, host: str) -> None:
+        """Run a requested probe, its errors are cached, not raised."""
+        try:
+            await self.async_probe(host)
+        except NameLookupError:
+            pass
+        except Exception as e:
+            _LOGGER.warning(f"Error pinging {host}: {e}")
+
+    async def _async_probe_due(self, _now: datetime | None = None) -> None:
+        """Ping all hosts not confirmed recently with one multi-host ping."""
+        now = time.monotonic()
+        due = [
+            host
+            for host, state in self._hosts.items()
+            if now - state.checked >= LIVENESS_PROBE_INTERVAL
+            and any(owner.suspended_until is None for owner in state.owners)
+        ]
+        if not due:
+            return
+        _LOGGER.debug("ping addresses: %s", due)
+        try:
+            results = await async_multiping(due, count=1, timeout=1, privileged=self._privileged)
+        except NameLookupError:
+            # One of the hosts does not resolve, probe them one by one
+            for host in due:
+                try:
+                    await self.async_probe(host)
+                except NameLookupError:
+                    pass
+            return
+        except Exception as e:
+            _LOGGER.warning(f"Error pinging {due}: {e}")
+            return
+        checked = time.monotonic()
+        for host, result in zip(due, results):
+            if (state := self._hosts.get(host)) is not None:
+                state.alive = result.is_alive
+                state.resolve_error = False
+                state.checked = checked
@@ -0,0 +1,57 @@
+"""Persisted identity (serial number, model) of a SolarMax inverter."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DEVICE_STORAGE_VERSION, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceMetadataCache:
+    """Serial number and model of an entry's inverter, kept across restarts.
+
+    Setup uses the stored values so the device has its identity even when
+    the inverter is offline at boot, the values are refreshed the first time
+    the inverter is online.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(hass, DEVICE_STORAGE_VERSION, f"{DOMAIN}.device.{entry_id}")
+        self.serial_number: str | None = None
+        self.model: str | None = None
+
+    @property
+    def cached(self) -> bool:
+        """Return True if an identity was read before."""
+        return self.serial_number is not None or self.model is not None
+
+    async def async_load(self) -> None:
+        """Load the stored identity."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        self.serial_number = stored.get("serial_number")
+        self.model = stored.get("model")
+        _LOGGER.debug(f"Loaded device metadata: serial {self.serial_number}, model {self.model}")
+
+    async def async_update(self, serial_number: str | None, model: str | None) -> bool:
+        """Store a freshly read identity, return True if it changed."""
+        if serial_number is None and model is None:
+            # Read failed, keep what we have
+            return False
+        if (serial_number, model) == (self.serial_number, self.model):
+            return False
+        self.serial_number = serial_number
+        self.model = model
+        await self._store.async_save({"serial_number": serial_number, "model": model})
+        return True
+
+    async def async_remove(self) -> None:
+        """Remove the stored identity."""
+        await self._store.async_remove()
@@ -0,0 +1,124 @@
+"""Cheap per-hub counters and histograms for the poll hot path."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+# Upper bounds (milliseconds) of the duration histogram buckets
+DURATION_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Decoding is far below a millisecond
+DECODE_BUCKETS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class Histogram:
+    """Fixed bucket histogram: observe() is one bisect and three additions."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: tuple[float, ...] = DURATION_BUCKETS_MS) -> None:
+        """Initialize the histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of all values."""
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return count, mean, p50, p95 and the cumulative buckets."""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class HubMetrics:
+    """Counters and histograms of one hub (durations in milliseconds)."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.polls = 0
+        self.poll_duration = Histogram()
+        self.ping_duration = Histogram()
+        self.ping_cache_hits = 0
+        self.connect_attempts = 0
+        self.connect_failures = 0
+        self.circuit_rejections = 0
+        self.modbus_exceptions = 0  # Exception replies of the inverter
+        self.errors: Counter[str] = Counter()  # Failed requests by exception type
+        self.bytes_read = 0
+        self.decode_duration = Histogram(DECODE_BUCKETS_MS)
+        self.entity_writes = 0
+        self.last_success: float | None = None  # Unix time of the last good poll
+        self.history_imports = 0
+        self.history_duration = Histogram()
+        self.history_rows = 0
+        self.rtc_syncs: Counter[str] = Counter()  # in_sync, written, failed
+
+    @property
+    def entity_writes_per_poll(self) -> float:
+        """Return the average number of state writes per poll."""
+        return self.entity_writes / self.polls if self.polls else 0.0
+
+    def summary(self) -> str:
+        """Return a one line summary for system health."""
+        return (
+            f"polls {self.polls}, poll {self.poll_duration.mean:.1f} ms mean / "
+            f"{self.poll_duration.quantile(0.95)} ms p95, errors {sum(self.errors.values()) + self.modbus_exceptions}, "
+            f"connect failures {self.connect_failures}/{self.connect_attempts}, "
+            f"writes/poll {self.entity_writes_per_poll:.1f}"
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics for diagnostics."""
+        return {
+            "polls": self.polls,
+            "poll_duration_ms": self.poll_duration.as_dict(),
+            "ping_duration_ms": self.ping_duration.as_dict(),
+            "ping_cache_hits": self.ping_cache_hits,
+            "connect_attempts": self.connect_attempts,
+            "connect_failures": self.connect_failures,
+            "circuit_rejections": self.circuit_rejections,
+            "modbus_exceptions": self.modbus_exceptions,
+            "errors": dict(self.errors),
+            "bytes_read": self.bytes_read,
+            "decode_duration_ms": self.decode_duration.as_dict(),
+            "entity_writes": self.entity_writes,
+            "entity_writes_per_poll": round(self.entity_writes_per_poll, 2),
+            "last_success": self.last_success,
+            "history_imports": self.history_imports,
+            "history_duration_ms": self.history_duration.as_dict(),
+            "history_rows": self.history_rows,
+            "rtc_syncs": dict(self.rtc_syncs),
+        }
@@ -0,0 +1,130 @@
+"""OpenMetrics (Prometheus) exposition of the poll metrics of all hubs."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .connection import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN
+from .const import CONF_METRICS_ENDPOINT, DEFAULT_METRICS_ENDPOINT, DOMAIN
+from .hub import SolarMaxModbusHub
+from .metrics import Histogram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+_CIRCUIT_STATES = (CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class SolarMaxMetricsView(HomeAssistantView):
+    """Serve the metrics of all entries with the metrics endpoint enabled.
+
+    The text is rendered as a stream of small fragments joined once per
+    scrape; the label set of each hub is built once and reused until its
+    host changes.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+        self._labels: dict[str, tuple[str, str]] = {}  # entry_id -> (host, label set)
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Render all metrics."""
+        hubs = list(self._enabled_hubs())
+        if not hubs:
+            return web.Response(status=404, text="No SolarMax entry exposes metrics")
+        return web.Response(body="".join(self.render(hubs)).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    def _enabled_hubs(self) -> Iterator[tuple[str, SolarMaxModbusHub]]:
+        """Yield label set and hub of every entry that opted in."""
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if not entry.options.get(CONF_METRICS_ENDPOINT, DEFAULT_METRICS_ENDPOINT):
+                continue
+            if (entry_data := self.hass.data[DOMAIN].get(entry.entry_id)) is None:
+                continue
+            hub: SolarMaxModbusHub = entry_data["hub"]
+            host = hub.connection.host
+            cached = self._labels.get(entry.entry_id)
+            if cached is None or cached[0] != host:
+                cached = self._labels[entry.entry_id] = (
+                    host, f'entry="{_escape(entry.title)}",host="{_escape(host)}"'
+                )
+            yield cached[1], hub
+
+    def render(self, hubs: list[tuple[str, SolarMaxModbusHub]]) -> Iterator[str]:
+        """Yield the exposition text in fragments."""
+        yield from _histogram("solarmax_poll_duration_milliseconds", "Duration of a poll",
+                              hubs, lambda hub: hub.metrics.poll_duration)
+        yield from _histogram("solarmax_decode_duration_milliseconds", "Duration of decoding a register block",
+                              hubs, lambda hub: hub.metrics.decode_duration)
+        yield from _counter("solarmax_polls", "Polls", hubs, lambda hub: hub.metrics.polls)
+        yield from _counter("solarmax_modbus_exceptions", "Exception replies of the inverter",
+                            hubs, lambda hub: hub.metrics.modbus_exceptions)
+        yield "# TYPE solarmax_errors counter\n# HELP solarmax_errors Failed requests by error type\n"
+        for labels, hub in hubs:
+            for error, count in hub.metrics.errors.items():
+                yield f'solarmax_errors_total{{{labels},type="{_escape(error)}"}} {count}\n'
+        yield from _counter("solarmax_connect_attempts", "Connect attempts",
+                            hubs, lambda hub: hub.metrics.connect_attempts)
+        yield from _counter("solarmax_connect_failures", "Failed connect attempts",
+                            hubs, lambda hub: hub.metrics.connect_failures)
+        yield from _counter("solarmax_read", "Bytes read from the inverter",
+                            hubs, lambda hub: hub.metrics.bytes_read, unit="bytes")
+        yield ("# TYPE solarmax_last_success_timestamp_seconds gauge\n"
+               "# HELP solarmax_last_success_timestamp_seconds Time of the last successful poll\n")
+        for labels, hub in hubs:
+            if hub.metrics.last_success is not None:
+                yield f"solarmax_last_success_timestamp_seconds{{{labels}}} {hub.metrics.last_success:.3f}\n"
+        yield "# TYPE solarmax_circuit stateset\n# HELP solarmax_circuit Circuit breaker of the gateway connection\n"
+        for labels, hub in hubs:
+            current = hub.connection.breaker.state
+            for state in _CIRCUIT_STATES:
+                yield f'solarmax_circuit{{{labels},solarmax_circuit="{state}"}} {int(state == current)}\n'
+        yield "# EOF\n"
+
+
+def _counter(name: str, help_text: str, hubs: list[tuple[str, SolarMaxModbusHub]],
+             value_fn: Callable[[SolarMaxModbusHub], int], unit: str = "") -> Iterator[str]:
+    """Yield a counter family."""
+    family = f"{name}_{unit}" if unit else name
+    yield f"# TYPE {family} counter\n"
+    if unit:
+        yield f"# UNIT {family} {unit}\n"
+    yield f"# HELP {family} {help_text}\n"
+    for labels, hub in hubs:
+        yield f"{family}_total{{{labels}}} {value_fn(hub)}\n"
+
+
+def _histogram(name: str, help_text: str, hubs: list[tuple[str, SolarMaxModbusHub]],
+               histogram_fn: Callable[[SolarMaxModbusHub], Histogram]) -> Iterator[str]:
+    """Yield a histogram family with cumulative buckets."""
+    yield f"# TYPE {name} histogram\n# UNIT {name} milliseconds\n# HELP {name} {help_text}\n"
+    for labels, hub in hubs:
+        histogram = histogram_fn(hub)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{float(bound)}"}} {cumulative}\n'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}\n'
+        yield f"{name}_count{{{labels}}} {histogram.count}\n"
+        yield f"{name}_sum{{{labels}}} {histogram.sum:.3f}\n"
+
+
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Register the metrics view once, if the http integration is loaded."""
+    if hass.data[DOMAIN].get("metrics_view") or getattr(hass, "http", None) is None:
+        return
+    hass.http.register_view(SolarMaxMetricsView(hass))
+    hass.data[DOMAIN]["metrics_view"] = True
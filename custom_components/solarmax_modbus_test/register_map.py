@@ -0,0 +1,128 @@
+"""Compile the declarative register maps from const.py."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any
+
+from . import const as _const
+from .const import (
+    DEFAULT_REGISTER_MAP,
+    MAX_READ_GAP,
+    MAX_READ_OTHER_TIER,
+    MAX_READ_REGISTERS,
+    REGISTER_MAPS,
+    TIER_FAST,
+    TIER_SLOW,
+)
+from .decode import register_width
+
+_TIERS = (TIER_FAST, TIER_SLOW)
+
+
+@dataclass(frozen=True)
+class ReadSpan:
+    """A contiguous range of holding registers read in one request."""
+
+    address: int
+    count: int
+
+
+@dataclass(frozen=True)
+class CompiledRegisterMap:
+    """Validated register map with the key_dict for SolarMaxModbusHub."""
+
+    fields: tuple[dict[str, Any], ...]
+    key_dict: dict[int, dict[str, Any]]
+    spans: tuple[ReadSpan, ...]
+
+
+def register_map_for_model(model: str | None) -> list[dict[str, Any]]:
+    """Return the register map matching a detected model (e.g. "SolarMax 6SMT")."""
+    for name, fields in REGISTER_MAPS.items():
+        if model and model.endswith(name):
+            return fields
+    return REGISTER_MAPS[DEFAULT_REGISTER_MAP]
+
+
+def compile_register_map(fields: list[dict[str, Any]]) -> CompiledRegisterMap:
+    """Validate a register map and derive key_dict and read spans.
+
+    Raises ValueError if keys are duplicated, fields overlap, a type or
+    status table is unknown or a tier or deadband is invalid.
+    """
+    key_dict: dict[int, dict[str, Any]] = {}
+    keys: set[str] = set()
+    end = 0
+    for field in sorted(fields, key=lambda f: f["address"]):
+        key = field["key"]
+        if key in keys:
+            raise ValueError(f"Duplicate register map key {key}")
+        keys.add(key)
+        address = field["address"]
+        if address < end:
+            raise ValueError(f"Register {address} ({key}) overlaps previous field")
+        _, length = register_width(field["type"])
+        if field["type"].startswith("STATUS") and not isinstance(getattr(_const, field["type"], None), dict):
+            raise ValueError(f"Unknown status table {field['type']} for {key}")
+        if field.get("tier", TIER_FAST) not in _TIERS:
+            raise ValueError(f"Unknown tier {field['tier']} for {key}")
+        for option in ("deadband", "deadband_rel", "max_age"):
+            if option in field and not (isinstance(field[option], (int, float)) and field[option] >= 0):
+                raise ValueError(f"Invalid {option} {field[option]} for {key}")
+        key_dict[address] = {
+            "key": key,
+            "type": field["type"],
+            "factor": field.get("factor", 1),
+            "tier": field.get("tier", TIER_FAST),
+        }
+        for option in ("deadband", "deadband_rel", "max_age"):
+            if option in field:
+                key_dict[address][option] = field[option]
+        end = address + length
+    return CompiledRegisterMap(
+        fields=tuple(fields),
+        key_dict=key_dict,
+        spans=tuple(compute_read_spans(key_dict)),
+    )
+
+
+def compute_read_spans(
+    key_dict: dict[int, dict[str, Any]],
+    tiers: tuple[str, ...] = _TIERS,
+    max_gap: int = MAX_READ_GAP,
+    max_count: int = MAX_READ_REGISTERS,
+    max_other: int = MAX_READ_OTHER_TIER,
+) -> list[ReadSpan]:
+    """Return the smallest set of contiguous reads covering the given tiers.
+
+    Neighbouring fields are merged into one span as long as the unused
+    registers between them do not exceed max_gap and the span stays within
+    the Modbus limit of max_count registers. A gap is only bridged if it
+    holds at most max_other registers of fields of other tiers, which are
+    read by their own tier's request anyway.
+    """
+    spans: list[ReadSpan] = []
+    others = sorted(a for a, entry in key_dict.items() if entry.get("tier", TIER_FAST) not in tiers)
+    # Registers of other tier fields below each entry of others
+    other_below = [0]
+    for address in others:
+        other_below.append(other_below[-1] + register_width(key_dict[address]["type"])[1])
+    start = end = None
+    for address in sorted(a for a, entry in key_dict.items() if entry.get("tier", TIER_FAST) in tiers):
+        _, length = register_width(key_dict[address]["type"])
+        if (
+            start is not None
+            and address - end <= max_gap
+            and address + length - start <= max_count
+            and other_below[bisect_left(others, address)] - other_below[bisect_left(others, end)] <= max_other
+        ):
+            end = max(end, address + length)
+            continue
+        if start is not None:
+            spans.append(ReadSpan(start, end - start))
+        start, end = address, address + length
+    if start is not None:
+        spans.append(ReadSpan(start, end - start))
+    return spans
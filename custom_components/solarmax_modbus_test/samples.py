@@ -0,0 +1,139 @@
+"""Fixed-memory ring buffer of decoded poll samples and its file export."""
+
+from __future__ import annotations
+
+import csv
+import math
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+
+# Binary export: magic, version, columns, rows, length of the column names,
+# then the newline separated column names (UTF-8) and the rows as
+# little-endian float64 (column 0 is the Unix time of the poll)
+SAMPLES_MAGIC = b"SMXS"
+SAMPLES_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+
+
+class SampleBuffer:
+    """Ring buffer of polls: one row of doubles per poll, no per-sample objects.
+
+    Row layout is the poll time followed by one column per field in the
+    order of keys; fields not read by a poll (other tier, failed span) are
+    NaN. All rows live in one preallocated array('d') of depth rows.
+    """
+
+    def __init__(self, keys: tuple[str, ...], depth: int) -> None:
+        """Initialize the buffer."""
+        self.keys = keys
+        self.columns = {key: column for column, key in enumerate(keys, 1)}
+        self.width = len(keys) + 1
+        self._empty_row = array("d", [math.nan]) * self.width
+        self._allocate(depth)
+
+    def _allocate(self, depth: int) -> None:
+        self.depth = depth
+        self._data = self._empty_row * depth
+        self._next = 0  # Row written by the next append
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of rows held."""
+        return self._count
+
+    @property
+    def memory(self) -> int:
+        """Return the size of the sample storage in bytes."""
+        return len(self._data) * self._data.itemsize
+
+    def new_row(self) -> array:
+        """Return an empty row for one poll to decode into."""
+        return array("d", self._empty_row)
+
+    def append(self, timestamp: float, row: array) -> None:
+        """Store a row, overwriting the oldest one if the buffer is full."""
+        if not self.depth:
+            return
+        row[0] = timestamp
+        offset = self._next * self.width
+        self._data[offset:offset + self.width] = row
+        self._next = (self._next + 1) % self.depth
+        self._count = min(self._count + 1, self.depth)
+
+    def _timestamp(self, index: int) -> float:
+        """Return the time of the index-th oldest row."""
+        return self._data[((self._next - self._count + index) % self.depth) * self.width]
+
+    def _bisect(self, timestamp: float) -> int:
+        """Return the index of the oldest row at or after timestamp."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def snapshot(self, start: float | None = None, end: float | None = None) -> array:
+        """Return a copy of the rows between start and end (Unix time, inclusive), oldest first.
+
+        The copy is taken as at most two slices of the storage, so a large
+        range costs two memory copies and no per-row work.
+        """
+        first = self._bisect(start) if start is not None else 0
+        last = self._bisect(math.nextafter(end, math.inf)) if end is not None else self._count
+        if first >= last:
+            return array("d")
+        begin = (self._next - self._count + first) % self.depth
+        rows = last - first
+        if begin + rows <= self.depth:
+            return self._data[begin * self.width:(begin + rows) * self.width]
+        return self._data[begin * self.width:] + self._data[:(begin + rows - self.depth) * self.width]
+
+    def resize(self, depth: int) -> None:
+        """Change the depth, keeping the most recent rows that still fit."""
+        if depth == self.depth:
+            return
+        rows = self.snapshot()
+        self._allocate(depth)
+        keep = min(len(rows) // self.width, depth)
+        if keep:
+            self._data[:keep * self.width] = rows[len(rows) - keep * self.width:]
+            self._count = keep
+            self._next = keep % depth
+
+
+def _rows(samples: array, width: int) -> Iterator[array]:
+    for offset in range(0, len(samples), width):
+        yield samples[offset:offset + width]
+
+
+def write_csv(path: str, keys: tuple[str, ...], samples: array) -> int:
+    """Write a snapshot as CSV (empty cells for fields not read), return the row count."""
+    width = len(keys) + 1
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(("timestamp", *keys))
+        writer.writerows(
+            [f"{row[0]:.3f}", *("" if math.isnan(value) else f"{value:.10g}" for value in row[1:])]
+            for row in _rows(samples, width)
+        )
+    return len(samples) // width
+
+
+def write_binary(path: str, keys: tuple[str, ...], samples: array) -> int:
+    """Write a snapshot in the compact binary format, return the row count."""
+    width = len(keys) + 1
+    names = "\n".join(("timestamp", *keys)).encode()
+    rows = len(samples) // width
+    if sys.byteorder != "little":
+        samples = array("d", samples)
+        samples.byteswap()
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(SAMPLES_MAGIC, SAMPLES_VERSION, width, rows, len(names)))
+        file.write(names)
+        samples.tofile(file)
+    return rows
@@ -0,0 +1,189 @@
+"""Shared poll scheduler for all SolarMax coordinators of the integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DEFAULT_MAX_CONCURRENT_POLLS, DEFAULT_MAX_POLLS_PER_HOST
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _PollJob:
+    """Scheduling state of one coordinator."""
+
+    coordinator: Any
+    interval: float = 0.0
+    phase: float = 0.0
+    due: float = 0.0
+    handle: asyncio.TimerHandle | None = None
+    task: asyncio.Task | None = None
+
+
+class SolarMaxPollScheduler:
+    """Drive the polls of all coordinators of the domain.
+
+    Coordinators with the same poll interval are spread evenly over that
+    interval instead of firing together, and Modbus transactions are capped
+    globally and per gateway host. Coordinators must expose poll_interval
+    (seconds) and are created without an update_interval of their own. A
+    coordinator may expose suspended_for (seconds), its next poll is then
+    the first slot of its grid after the suspension.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_POLLS,
+        max_per_host: int = DEFAULT_MAX_POLLS_PER_HOST,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._jobs: dict[Any, _PollJob] = {}
+        self._anchor = hass.loop.time()
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._max_per_host = max_per_host
+        self._per_host: dict[str, asyncio.Semaphore] = {}
+        self._in_flight = 0
+        self._polls = 0
+        self._overruns = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+
+    @callback
+    def async_add(self, coordinator: Any) -> None:
+        """Start scheduling a coordinator."""
+        if coordinator not in self._jobs:
+            self._jobs[coordinator] = _PollJob(coordinator)
+            self._async_rebalance()
+
+    @callback
+    def async_remove(self, coordinator: Any) -> asyncio.Task | None:
+        """Stop scheduling a coordinator and cancel its running poll.
+
+        Returns the cancelled poll task, the caller awaits it before closing
+        anything the poll uses.
+        """
+        job = self._jobs.pop(coordinator, None)
+        if job is None:
+            return None
+        if job.handle is not None:
+            job.handle.cancel()
+        self._async_rebalance()
+        if job.task is None or job.task.done():
+            return None
+        job.task.cancel()
+        return job.task
+
+    @callback
+    def async_reschedule(self, coordinator: Any) -> None:
+        """Pick up a changed poll_interval of a coordinator."""
+        if coordinator in self._jobs:
+            self._async_rebalance()
+
+    @callback
+    def async_poll_now(self, coordinator: Any) -> None:
+        """Start a poll of a scheduled coordinator outside its slot, keeping its phase."""
+        if (job := self._jobs.get(coordinator)) is not None:
+            self._async_start_poll(job)
+
+    @callback
+    def async_interval_changed(self, coordinator: Any) -> None:
+        """Move the next poll of an adaptive coordinator to its new interval.
+
+        Unlike async_reschedule this keeps the phases of all other
+        coordinators untouched.
+        """
+        if (job := self._jobs.get(coordinator)) is None:
+            return
+        job.interval = float(coordinator.poll_interval)
+        self._async_schedule(job, self.hass.loop.time())
+
+    @asynccontextmanager
+    async def transaction(self, host: str) -> AsyncIterator[None]:
+        """Hold one of the global and per-host Modbus transaction slots."""
+        host_slots = self._per_host.get(host)
+        if host_slots is None:
+            host_slots = self._per_host[host] = asyncio.Semaphore(self._max_per_host)
+        # Wait for the gateway first so a busy host does not block a global slot
+        async with host_slots, self._global:
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return scheduling statistics (lag in milliseconds)."""
+        return {
+            "scheduled_coordinators": len(self._jobs),
+            "in_flight": self._in_flight,
+            "polls": self._polls,
+            "overruns": self._overruns,
+            "lag_last_ms": round(self._lag_last * 1000, 1),
+            "lag_mean_ms": round(self._lag_sum / self._polls * 1000, 1) if self._polls else 0.0,
+            "lag_max_ms": round(self._lag_max * 1000, 1),
+        }
+
+    @callback
+    def _async_rebalance(self) -> None:
+        """Spread the phases of all coordinators sharing an interval evenly."""
+        groups: dict[float, list[_PollJob]] = defaultdict(list)
+        for job in self._jobs.values():
+            job.interval = float(job.coordinator.poll_interval)
+            groups[job.interval].append(job)
+        now = self.hass.loop.time()
+        for interval, jobs in groups.items():
+            for index, job in enumerate(jobs):
+                job.phase = interval * index / len(jobs)
+                self._async_schedule(job, now)
+
+    @callback
+    def _async_schedule(self, job: _PollJob, now: float) -> None:
+        """Schedule the next poll of a job at its next phase slot."""
+        if job.handle is not None:
+            job.handle.cancel()
+        start = now + getattr(job.coordinator, "suspended_for", 0.0)
+        elapsed = start - self._anchor - job.phase
+        job.due = self._anchor + job.phase + (math.floor(elapsed / job.interval) + 1) * job.interval
+        job.handle = self.hass.loop.call_at(job.due, self._async_fire, job)
+
+    @callback
+    def _async_fire(self, job: _PollJob) -> None:
+        """Start a poll and schedule the next one."""
+        now = self.hass.loop.time()
+        lag = now - job.due
+        job.handle = None
+        self._polls += 1
+        self._lag_last = lag
+        self._lag_sum += lag
+        self._lag_max = max(self._lag_max, lag)
+        if not self._async_start_poll(job):
+            # Previous poll still running, skip this slot
+            self._overruns += 1
+            _LOGGER.debug(f"Poll of {job.coordinator.name} still running, skipping slot")
+        # Adaptive intervals keep their phase offset, only the period changes
+        job.interval = float(job.coordinator.poll_interval)
+        self._async_schedule(job, now)
+
+    @callback
+    def _async_start_poll(self, job: _PollJob) -> bool:
+        """Start a poll of a job unless one is running, return True if started."""
+        if job.task is not None and not job.task.done():
+            return False
+        job.task = self.hass.async_create_background_task(
+            job.coordinator.async_refresh(), f"{job.coordinator.name} poll"
+        )
+        return True
@@ -1,16 +1,21 @@
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from .const import DOMAIN, line_sensor, pv_sensor, energy_sensor, power_sensors
+from .const import DOMAIN, TIER_FAST
 from .hub import SolarMaxModbusHub
+from .metrics import HubMetrics
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 import logging
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntityDescription
-from homeassistant.const import UnitOfPower, UnitOfTemperature
+import time
+from homeassistant.components.sensor import SensorEntityDescription
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,149 +26,71 @@ class SolarMaxSensorEntityDescription(SensorEntityDescription):
     factor: float = 1
     position: float = 0
     data_type: str = ""
+    tier: str = TIER_FAST
+
+
+@dataclass
+class SolarMaxMetricEntityDescription(SensorEntityDescription):
+    """A class that describes SolarMax diagnostic metric sensors."""
+    value_fn: Callable[[HubMetrics], Any] = lambda metrics: None
+
+
+METRIC_SENSORS = (
+    SolarMaxMetricEntityDescription(
+        key="metric_polls", name="Polls", state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter", value_fn=lambda m: m.polls,
+    ),
+    SolarMaxMetricEntityDescription(
+        key="metric_poll_duration", name="Poll duration", native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION, state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline", value_fn=lambda m: round(m.poll_duration.mean, 1),
+    ),
+    SolarMaxMetricEntityDescription(
+        key="metric_errors", name="Poll errors", state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle-outline", value_fn=lambda m: sum(m.errors.values()) + m.modbus_exceptions,
+    ),
+    SolarMaxMetricEntityDescription(
+        key="metric_connect_failures", name="Connect failures", state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:lan-disconnect", value_fn=lambda m: m.connect_failures,
+    ),
+    SolarMaxMetricEntityDescription(
+        key="metric_history_rows", name="History rows imported", state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:database-import", value_fn=lambda m: m.history_rows,
+    ),
+    SolarMaxMetricEntityDescription(
+        key="metric_last_success", name="Last successful poll", device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:clock-check-outline",
+        value_fn=lambda m: datetime.fromtimestamp(m.last_success, timezone.utc) if m.last_success else None,
+    ),
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up SolarMax sensors from a config entry."""
     hub: SolarMaxModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
     device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
+    register_map = hass.data[DOMAIN][entry.entry_id]["register_map"]
     entities = []
-    offset = 0
-    key_dict = {}
-    for i in range(3):
-        for sens in line_sensor:
-        # {"name": "Voltage",   "type": "uint16", "factor":  0.1,
-        #  "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-        #  "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
-            sensor_key = f"L{i+1}{sens["name"]}"
-            sensor = SolarMaxSensorEntityDescription(
-                name=f"L{i+1} {sens["name"]}",
-                key=sensor_key,
-                native_unit_of_measurement=sens["unit"],
-                icon=sens["icon"],
-                device_class=sens["device_class"],
-                state_class=SensorStateClass.MEASUREMENT,
-                entity_registry_enabled_default=True,
-                factor=sens["factor"],
-                data_type=sens["type"]
-            )
-            entity = SolarMaxSensor(hub, device_info, sensor)
-            entities.append(entity)
-            key_dict[offset] = {"key": sensor_key, "type": sens["type"], "factor": sens["factor"]}
-            offset += 1
-            if str(sens["type"]).endswith("32"):
-                offset += 1
-            elif str(sens["type"]).endswith("64"):
-                offset += 3
-    for i in range(3):
-        for sens in pv_sensor:
-        # {"name": "Voltage",   "type": "uint16", "factor":  0.1,
-        #  "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-        #  "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
-            sensor_key = f"PV{i+1}{sens["name"]}"
-            sensor = SolarMaxSensorEntityDescription(
-                name=f"PV{i+1} {sens["name"]}",
-                key=sensor_key,
-                native_unit_of_measurement=sens["unit"],
-                icon=sens["icon"],
-                device_class=sens["device_class"],
-                state_class=SensorStateClass.MEASUREMENT,
-                entity_registry_enabled_default=True,
-                factor=sens["factor"],
-                data_type=sens["type"]
-            )
-            entity = SolarMaxSensor(hub, device_info, sensor)
-            entities.append(entity)
-            key_dict[offset] = {"key": sensor_key, "type": sens["type"], "factor": sens["factor"]}
-            offset += 1
-            if str(sens["type"]).endswith("32"):
-                offset += 1
-            elif str(sens["type"]).endswith("64"):
-                offset += 3
-
-    sensor_key = "Temperature"
-    sensor = SolarMaxSensorEntityDescription(
-        name="Temperature",
-        key=sensor_key,
-        icon="mdi:thermometer",
-        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-        entity_registry_enabled_default=True,
-        data_type="UINT16"
-    )
-    entity = SolarMaxSensor(hub, device_info, sensor)
-    entities.append(entity)
-    key_dict[offset] = {"key": sensor_key, "type": "UINT16", "factor": 1}
-    offset += 1
-
-    sensor_key = "InverterMode"
-    sensor = SolarMaxSensorEntityDescription(
-        name="Inverter Mode",
-        key=sensor_key,
-        icon="mdi:information-outline",
-        entity_registry_enabled_default=True,
-        data_type="STATUS_INVERTER_MODE"
-    )
-    entity = SolarMaxSensor(hub, device_info, sensor)
-    entities.append(entity)
-    key_dict[offset] = {"key": sensor_key, "type": "STATUS_INVERTER_MODE", "factor": 1}
-    offset += 1
-
-    offset += 3 # skip 3 byte
-
-    for sens in energy_sensor:
-    # {"name": "Voltage",   "type": "uint16", "factor":  0.1,
-    #  "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-    #  "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
-        sensor_key = sens["name"].replace(" ", "_")
-        sensor = SolarMaxSensorEntityDescription(
-            name=sens["name"],
-            key=sensor_key,
-            native_unit_of_measurement=sens["unit"],
-            icon=sens["icon"],
-            device_class=sens["device_class"],
-            state_class=sens["state_class"],
-            entity_registry_enabled_default=True,
-            factor=sens["factor"],
-            data_type=sens["type"]
-        )
-        entity = SolarMaxSensor(hub, device_info, sensor)
-        entities.append(entity)
-        key_dict[offset] = {"key": sensor_key, "type": sens["type"], "factor": sens["factor"]}
-        offset += 1
-        if str(sens["type"]).endswith("32"):
-            offset += 1
-        elif str(sens["type"]).endswith("64"):
-            offset += 3
-
-    offset += 14 # skip 14 regs
-
-    for sens in power_sensors:
-    # {"name": "Voltage",   "type": "uint16", "factor":  0.1,
-    #  "unit": UnitOfElectricPotential.VOLT, "device_class": SensorDeviceClass.VOLTAGE,
-    #  "state_class": SensorStateClass.MEASUREMENT, "icon": "mdi:sine-wave"},
-        sensor_key = sens["name"].replace(" ", "_")
+    for field in register_map.fields:
         sensor = SolarMaxSensorEntityDescription(
-            name=sens["name"],
-            key=sensor_key,
-            native_unit_of_measurement=sens["unit"],
-            icon=sens["icon"],
-            device_class=sens["device_class"],
-            state_class=sens["state_class"],
+            name=field["name"],
+            key=field["key"],
+            native_unit_of_measurement=field["unit"],
+            icon=field["icon"],
+            device_class=field["device_class"],
+            state_class=field["state_class"],
             entity_registry_enabled_default=True,
-            factor=sens["factor"],
-            data_type=sens["type"]
+            factor=field["factor"],
+            position=field["address"],
+            data_type=field["type"],
+            tier=field["tier"]
         )
-        entity = SolarMaxSensor(hub, device_info, sensor)
-        entities.append(entity)
-        key_dict[offset] = {"key": sensor_key, "type": sens["type"], "factor": sens["factor"]}
-        offset += 1
-        if str(sens["type"]).endswith("32"):
-            offset += 1
-        elif str(sens["type"]).endswith("64"):
-            offset += 3
+        entities.append(SolarMaxSensor(hub, device_info, sensor))
+
+    # Poll metrics, disabled by default
+    entities.extend(SolarMaxMetricSensor(hub, device_info, description) for description in METRIC_SENSORS)
 
     async_add_entities(entities)
-    hub.set_key_dict(key_dict)
     _LOGGER.info(f"Added {len(entities)} SolarMax sensors")
 
 class SolarMaxSensor(CoordinatorEntity, SensorEntity):
@@ -171,7 +98,11 @@ class SolarMaxSensor(CoordinatorEntity, SensorEntity):
 
     def __init__(self, hub: SolarMaxModbusHub, device_info: dict, description: SolarMaxSensorEntityDescription):
         """Initialize the sensor."""
-        super().__init__(coordinator=hub)
+        # Fast tier sensors listen to the fast coordinator if fast polling is enabled
+        super().__init__(coordinator=hub.coordinator_for_tier(description.tier))
+        self._hub = hub
+        self._last_write = 0.0
+        self._last_available: bool | None = None
         self.entity_description = description
         self._attr_device_info = device_info
         # Stable unique_id: independent of coordinator name
@@ -209,11 +140,54 @@ class SolarMaxSensor(CoordinatorEntity, SensorEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+        """Handle updated data from the coordinator.
+
+        The state is only written if the value or availability changed, or
+        the heartbeat interval elapsed since the last write.
+        """
+        changed_keys = self.coordinator.changed_keys
+        available = self.available
+        now = time.monotonic()
+        if (
+            changed_keys is None
+            or self.entity_description.key in changed_keys
+            or available != self._last_available
+            or now - self._last_write >= self._hub.heartbeat_interval
+        ):
+            self._last_write = now
+            self._last_available = available
+            self._hub.metrics.entity_writes += 1
+            self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
         await super().async_added_to_hass()
 
         # _LOGGER.debug(f"Sensor {self._attr_name} added to Home Assistant")
+
+
+class SolarMaxMetricSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor exposing one poll metric of a hub."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, hub: SolarMaxModbusHub, device_info: dict, description: SolarMaxMetricEntityDescription):
+        """Initialize the sensor."""
+        super().__init__(coordinator=hub)
+        self._hub = hub
+        self.entity_description = description
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{device_info.get('name', 'SolarMax')}_{description.key}"
+        self._attr_name = description.name
+
+    @property
+    def native_value(self):
+        """Return the current metric value."""
+        return self.entity_description.value_fn(self._hub.metrics)
+
+    @property
+    def available(self) -> bool:
+        """Metrics are available even while the inverter is offline."""
+        return True
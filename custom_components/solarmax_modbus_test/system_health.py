@@ -4,7 +4,6 @@ from typing import Any
 
 from homeassistant.components import system_health
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.config_entries import ConfigEntry
 from .const import DOMAIN
 
 @callback
@@ -14,12 +13,19 @@ def async_register(hass: HomeAssistant, register: system_health.SystemHealthRegi
 
 async def system_health_info(hass: HomeAssistant) -> dict[str, Any]:
     """Get info for the info page."""
-    config_entry: ConfigEntry = hass.config_entries.async_entries(DOMAIN)[0]
     #quota_info = await config_entry.runtime_data.async_get_quota_info()
 
+    scheduler = hass.data[DOMAIN]["scheduler"]
+    # One line of poll metrics per configured inverter
+    hubs = {}
+    for config_entry in hass.config_entries.async_entries(DOMAIN):
+        if (entry_data := hass.data[DOMAIN].get(config_entry.entry_id)) is not None:
+            hubs[config_entry.title] = entry_data["hub"].metrics.summary()
+
     return {
         "state": "up",
-        "data": f"{config_entry.data}",
+        **{f"scheduler_{key}": value for key, value in scheduler.stats.items()},
+        **hubs,
         #"consumed_requests": quota_info.consumed_requests,
         #"remaining_requests": quota_info.requests_remaining,
         # checking the url can take a while, so set the coroutine in the info dict
@@ -0,0 +1 @@
+"""Tests for the SolarMax Modbus integration."""
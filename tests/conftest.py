@@ -0,0 +1,9 @@
+"""Fixtures for the SolarMax Modbus tests."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading custom_components in all tests."""
+    yield
@@ -0,0 +1,237 @@
+"""Tests for the RTT derived timeouts and the connect circuit breaker."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.solarmax_modbus_test import connection
+from custom_components.solarmax_modbus_test.connection import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    ModbusConnection,
+    RttEstimator,
+)
+from custom_components.solarmax_modbus_test.const import (
+    CIRCUIT_BACKOFF_MAX,
+    CIRCUIT_BACKOFF_MIN,
+    RTT_INITIAL_TIMEOUT,
+    RTT_MAX_RETRIES,
+    RTT_MIN_TIMEOUT,
+    RTT_RETRY_BUDGET,
+)
+
+
+class _Clock:
+    """Monotonic clock advanced by the test."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def clock_fixture(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    """Patch the monotonic clock of the connection module."""
+    clock = _Clock()
+    monkeypatch.setattr(connection, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture(name="jitter")
+def jitter_fixture(monkeypatch: pytest.MonkeyPatch) -> list[tuple[float, float]]:
+    """Patch the jitter to its upper bound and record the requested ranges."""
+    calls: list[tuple[float, float]] = []
+
+    def uniform(low: float, high: float) -> float:
+        calls.append((low, high))
+        return high
+
+    monkeypatch.setattr(connection, "random", SimpleNamespace(uniform=uniform))
+    return calls
+
+
+def test_rtt_initial_timeouts() -> None:
+    """Without samples the first attempt waits RTT_INITIAL_TIMEOUT."""
+    rtt = RttEstimator()
+    assert rtt.attempt_timeouts() == [RTT_INITIAL_TIMEOUT, 2 * RTT_INITIAL_TIMEOUT]
+    assert rtt.retries == 1
+
+
+def test_rtt_floor() -> None:
+    """A fast gateway cannot push the timeout below RTT_MIN_TIMEOUT."""
+    rtt = RttEstimator()
+    for _ in range(50):
+        rtt.sample(0.004)
+    assert rtt.srtt == pytest.approx(0.004)
+    assert rtt.rto == RTT_MIN_TIMEOUT
+    assert rtt.timeout == RTT_MIN_TIMEOUT
+    assert rtt.attempt_timeouts() == pytest.approx([0.05, 0.1, 0.2])
+
+
+def test_rtt_estimate() -> None:
+    """SRTT and RTTVAR follow RFC 6298."""
+    rtt = RttEstimator()
+    rtt.sample(0.2)
+    assert (rtt.srtt, rtt.rttvar, rtt.rto) == pytest.approx((0.2, 0.1, 0.6))
+    rtt.sample(0.4)
+    assert rtt.rttvar == pytest.approx(0.75 * 0.1 + 0.25 * 0.2)
+    assert rtt.srtt == pytest.approx(0.875 * 0.2 + 0.125 * 0.4)
+    assert rtt.rto == pytest.approx(rtt.srtt + 4 * rtt.rttvar)
+    assert rtt.samples == 2
+
+
+@pytest.mark.parametrize(
+    ("timeout", "expected"),
+    [
+        (0.05, [0.05, 0.1, 0.2]),
+        (0.3, [0.3, 0.6, 1.2]),
+        (0.5, [0.5, 1.0]),
+        (1.0, [1.0, 2.0]),
+        (1.5, [1.5]),
+        (2.0, [2.0]),
+        (5.0, [3.0]),
+    ],
+)
+def test_rtt_attempt_ladder(timeout: float, expected: list[float]) -> None:
+    """Attempt timeouts double and all attempts fit into the retry budget."""
+    rtt = RttEstimator()
+    rtt.keep_backoff(timeout)
+    timeouts = rtt.attempt_timeouts()
+    assert timeouts == pytest.approx(expected)
+    assert sum(timeouts) <= RTT_RETRY_BUDGET
+    assert len(timeouts) <= RTT_MAX_RETRIES + 1
+    assert all(later == 2 * earlier for earlier, later in zip(timeouts, timeouts[1:]))
+
+
+async def test_rtt_karn_rule() -> None:
+    """Retried requests are not sampled but keep their backed-off timeout."""
+    modbus = ModbusConnection("192.0.2.10", 502)
+    modbus.rtt.sample(0.004)
+    attempts = 0
+
+    async def answer_on(answered: int) -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts < answered:
+            await asyncio.sleep(10)
+        return "ok"
+
+    # Answered on the retry: no sample, the next request starts backed off
+    assert await modbus._async_request(answer_on, 2) == "ok"
+    assert attempts == 2
+    assert modbus.rtt.samples == 1
+    assert modbus.rtt.timeouts == 1
+    assert modbus.rtt.timeout == pytest.approx(2 * RTT_MIN_TIMEOUT)
+
+    # Answered on the first attempt: sampled, back to the RTO
+    attempts = 0
+    assert await modbus._async_request(answer_on, 1) == "ok"
+    assert modbus.rtt.samples == 2
+    assert modbus.rtt.timeout == modbus.rtt.rto == RTT_MIN_TIMEOUT
+
+    # No answer at all: every planned attempt timed out, back to the RTO
+    modbus.rtt.keep_backoff(2 * RTT_MIN_TIMEOUT)
+    attempts = 0
+    with pytest.raises(asyncio.TimeoutError):
+        await modbus._async_request(answer_on, 10)
+    assert attempts == 3
+    assert modbus.rtt.samples == 2
+    assert modbus.rtt.timeout == RTT_MIN_TIMEOUT
+
+
+def test_breaker_opens_after_threshold(clock: _Clock, jitter: list) -> None:
+    """The circuit opens after three consecutive failures."""
+    breaker = CircuitBreaker()
+    assert breaker.record_failure() is None
+    assert breaker.record_failure() is None
+    breaker.check()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    assert breaker.record_failure() == CIRCUIT_BACKOFF_MIN
+    assert jitter == [(0.5, 1.0)]
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.opened == 1
+    clock.now += CIRCUIT_BACKOFF_MIN - 0.1
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_breaker_half_open_cycle(clock: _Clock, jitter: list) -> None:
+    """Open lets one attempt through, success closes, failure doubles the backoff."""
+    breaker = CircuitBreaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += CIRCUIT_BACKOFF_MIN
+    breaker.check()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    # Only one attempt while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    assert breaker.record_failure() == 2 * CIRCUIT_BACKOFF_MIN
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.opened == 2
+
+    clock.now += 2 * CIRCUIT_BACKOFF_MIN
+    breaker.check()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.failures == 0
+    breaker.check()
+
+    # Closed again: the threshold and the minimum backoff apply again
+    assert breaker.record_failure() is None
+    assert breaker.record_failure() is None
+    assert breaker.record_failure() == CIRCUIT_BACKOFF_MIN
+
+
+def test_breaker_backoff_capped(clock: _Clock, jitter: list) -> None:
+    """The backoff doubles from 10 s up to 600 s."""
+    breaker = CircuitBreaker()
+    for _ in range(2):
+        breaker.record_failure()
+    delays = []
+    for _ in range(8):
+        delays.append(breaker.record_failure())
+        clock.now += delays[-1]
+        breaker.check()
+    assert delays == [10, 20, 40, 80, 160, 320, CIRCUIT_BACKOFF_MAX, CIRCUIT_BACKOFF_MAX]
+
+
+def test_breaker_jitter(clock: _Clock, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retries are jittered over the upper half of the backoff."""
+    monkeypatch.setattr(connection, "random", SimpleNamespace(uniform=lambda low, high: low))
+    breaker = CircuitBreaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.record_failure() == CIRCUIT_BACKOFF_MIN / 2
+    clock.now += CIRCUIT_BACKOFF_MIN / 2
+    breaker.check()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+
+def test_breaker_abort_keeps_backoff(clock: _Clock, jitter: list) -> None:
+    """An aborted half-open attempt reopens the circuit without doubling."""
+    breaker = CircuitBreaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += CIRCUIT_BACKOFF_MIN
+    breaker.check()
+    breaker.abort()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.opened == 1
+    assert breaker.as_dict()["retry_in"] == CIRCUIT_BACKOFF_MIN
+    # Abort outside of half-open does nothing
+    clock.now += CIRCUIT_BACKOFF_MIN
+    breaker.check()
+    breaker.record_success()
+    breaker.abort()
+    assert breaker.state == CIRCUIT_CLOSED
@@ -0,0 +1,124 @@
+"""Tests for the precompiled decode plans."""
+
+import random
+import struct
+from array import array
+
+import pytest
+from pymodbus.client import AsyncModbusTcpClient
+
+from custom_components.solarmax_modbus_test.const import REGISTER_MAPS, STATUS_INVERTER_MODE, TIER_FAST
+from custom_components.solarmax_modbus_test.decode import compile_decode_plan, register_width
+from custom_components.solarmax_modbus_test.register_map import compile_register_map, compute_read_spans
+
+
+def _span_keys(key_dict: dict, address: int, count: int, tiers: tuple[str, ...] | None = None) -> dict:
+    """Return the fields of a span keyed by their offset, as the hub builds them."""
+    return {
+        field_address - address: entry
+        for field_address, entry in key_dict.items()
+        if address <= field_address < address + count and (tiers is None or entry["tier"] in tiers)
+    }
+
+
+def _expected(span_keys: dict, registers: list[int]) -> dict:
+    """Decode a block field by field with pymodbus."""
+    expected = {}
+    for offset, entry in span_keys.items():
+        _, length = register_width(entry["type"])
+        if entry["type"].startswith("STATUS"):
+            code = registers[offset]
+            expected[entry["key"]] = STATUS_INVERTER_MODE.get(code, f"unknown {code}")
+            continue
+        value = AsyncModbusTcpClient.convert_from_registers(
+            registers[offset:offset + length], AsyncModbusTcpClient.DATATYPE[entry["type"]]
+        )
+        expected[entry["key"]] = value * entry["factor"]
+    return expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decode_matches_pymodbus(seed: int) -> None:
+    """The struct plan decodes every field like convert_from_registers."""
+    key_dict = compile_register_map(REGISTER_MAPS["SP"]).key_dict
+    rng = random.Random(seed)
+    registers = [rng.randrange(0x10000) for _ in range(60)]
+    registers[4125 - 4097] = rng.choice(list(STATUS_INVERTER_MODE))
+    span_keys = _span_keys(key_dict, 4097, 60)
+    plan = compile_decode_plan(span_keys, 60)
+    data: dict = {}
+    changed: set[str] = set()
+    plan.decode(registers, data, changed, {}, 0.0)
+    assert data == _expected(span_keys, registers)
+    assert changed == set(data)
+
+
+def test_decode_fast_tier_spans() -> None:
+    """Plans of the fast spans skip the fields of the slow tier they read along."""
+    key_dict = compile_register_map(REGISTER_MAPS["SP"]).key_dict
+    registers = list(range(1000, 1060))
+    data: dict = {}
+    for span in compute_read_spans(key_dict, (TIER_FAST,)):
+        span_keys = _span_keys(key_dict, span.address, span.count, (TIER_FAST,))
+        block = registers[span.address - 4097:span.address - 4097 + span.count]
+        compile_decode_plan(span_keys, span.count).decode(block, data, set(), {}, 0.0)
+        assert {key: data[key] for key in _expected(span_keys, block)} == _expected(span_keys, block)
+    assert "Temperature" not in data
+    assert "Total_Energy" not in data
+    assert data["InverterMode"] == "unknown 1028"
+
+
+def test_decode_status_and_sample_row() -> None:
+    """Status codes are mapped, the sample row gets the raw code and unfiltered values."""
+    key_dict = {
+        0: {"key": "Voltage", "type": "UINT16", "factor": 0.1, "deadband": 0.15},
+        2: {"key": "InverterMode", "type": "STATUS_INVERTER_MODE", "factor": 1},
+    }
+    plan = compile_decode_plan(key_dict, 3, {"Voltage": 1, "InverterMode": 2})
+    row = array("d", [0.0, 0.0, 0.0])
+    data: dict = {}
+    plan.decode([2301, 0, 3], data, set(), {}, 0.0, row)
+    assert data == {"Voltage": pytest.approx(230.1), "InverterMode": "OnGrid"}
+    assert list(row) == [0.0, pytest.approx(230.1), 3.0]
+
+
+def test_decode_deadband() -> None:
+    """A deadband field publishes only changes beyond the deadband or when stale."""
+    key_dict = {0: {"key": "Voltage", "type": "UINT16", "factor": 0.1, "deadband": 0.15, "max_age": 60}}
+    plan = compile_decode_plan(key_dict, 1)
+    data: dict = {}
+    published_at: dict = {}
+
+    def decode(raw: int, now: float) -> set[str]:
+        changed: set[str] = set()
+        plan.decode([raw], data, changed, published_at, now)
+        return changed
+
+    assert decode(2301, 0.0) == {"Voltage"}
+    assert decode(2302, 10.0) == set()  # 1 LSB of noise
+    assert data["Voltage"] == pytest.approx(230.1)
+    assert decode(2303, 20.0) == {"Voltage"}  # 2 LSB
+    assert decode(2302, 30.0) == set()
+    assert decode(2302, 80.0) == {"Voltage"}  # Published value older than max_age
+    assert published_at["Voltage"] == 80.0
+
+
+def test_decode_wrong_block_size() -> None:
+    """A block of the wrong size raises struct.error."""
+    plan = compile_decode_plan({0: {"key": "Power", "type": "UINT32", "factor": 1}}, 2)
+    with pytest.raises(struct.error):
+        plan.decode([1, 2, 3], {}, set(), {}, 0.0)
+
+
+@pytest.mark.parametrize(
+    ("key_dict", "count", "message"),
+    [
+        ({0: {"key": "a", "type": "UINT32", "factor": 1}, 1: {"key": "b", "type": "UINT16", "factor": 1}},
+         3, "Register offset 1 \\(b\\) overlaps previous field"),
+        ({0: {"key": "a", "type": "UINT32", "factor": 1}}, 1, "Register map needs 2 registers, block has only 1"),
+    ],
+)
+def test_compile_invalid_decode_plan(key_dict: dict, count: int, message: str) -> None:
+    """Overlapping fields and too small blocks are rejected."""
+    with pytest.raises(ValueError, match=message):
+        compile_decode_plan(key_dict, count)
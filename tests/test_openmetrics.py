@@ -0,0 +1,135 @@
+"""Tests for the OpenMetrics endpoint."""
+
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from custom_components.solarmax_modbus_test.connection import CircuitBreaker
+from custom_components.solarmax_modbus_test.const import CONF_METRICS_ENDPOINT, DOMAIN
+from custom_components.solarmax_modbus_test.metrics import HubMetrics
+from custom_components.solarmax_modbus_test.openmetrics import (
+    CONTENT_TYPE,
+    SolarMaxMetricsView,
+    async_register_metrics_view,
+)
+
+LABELS = 'entry="Roof",host="192.0.2.10"'
+
+
+def _hub() -> SimpleNamespace:
+    """Return a hub with a few polls recorded."""
+    metrics = HubMetrics()
+    metrics.polls = 3
+    for duration in (4, 40, 4000):
+        metrics.poll_duration.observe(duration)
+    metrics.decode_duration.observe(0.02)
+    metrics.modbus_exceptions = 1
+    metrics.errors["TimeoutError"] = 2
+    metrics.connect_attempts = 2
+    metrics.connect_failures = 1
+    metrics.bytes_read = 240
+    metrics.last_success = 1700000000.5
+    breaker = CircuitBreaker()
+    breaker.state = "open"
+    return SimpleNamespace(name="Roof", metrics=metrics, connection=SimpleNamespace(host="192.0.2.10", breaker=breaker))
+
+
+def _render(hass: HomeAssistant) -> list[str]:
+    return "".join(SolarMaxMetricsView(hass).render([(LABELS, _hub())])).splitlines()
+
+
+async def test_render_terminated_by_eof(hass: HomeAssistant) -> None:
+    """The exposition ends with exactly one # EOF line."""
+    lines = _render(hass)
+    assert lines[-1] == "# EOF"
+    assert lines.count("# EOF") == 1
+
+
+async def test_render_counters(hass: HomeAssistant) -> None:
+    """Counter samples carry the _total suffix, families do not."""
+    lines = _render(hass)
+    assert "# TYPE solarmax_polls counter" in lines
+    assert f"solarmax_polls_total{{{LABELS}}} 3" in lines
+    assert f"solarmax_modbus_exceptions_total{{{LABELS}}} 1" in lines
+    assert f'solarmax_errors_total{{{LABELS},type="TimeoutError"}} 2' in lines
+    assert f"solarmax_connect_attempts_total{{{LABELS}}} 2" in lines
+    assert f"solarmax_connect_failures_total{{{LABELS}}} 1" in lines
+    assert "# TYPE solarmax_read_bytes counter" in lines
+    assert "# UNIT solarmax_read_bytes bytes" in lines
+    assert f"solarmax_read_bytes_total{{{LABELS}}} 240" in lines
+    assert f"solarmax_last_success_timestamp_seconds{{{LABELS}}} 1700000000.500" in lines
+    samples = [line for line in lines if not line.startswith("#")]
+    counters = {line.split()[2] for line in lines if line.startswith("# TYPE") and line.endswith(" counter")}
+    for line in samples:
+        name = line.split("{")[0]
+        if name.removesuffix("_total") in counters:
+            assert name.endswith("_total")
+
+
+async def test_render_histogram_buckets(hass: HomeAssistant) -> None:
+    """Histogram buckets are cumulative, with float le labels and +Inf."""
+    lines = _render(hass)
+    name = "solarmax_poll_duration_milliseconds"
+    assert f"# TYPE {name} histogram" in lines
+    assert f"# UNIT {name} milliseconds" in lines
+    assert f'{name}_bucket{{{LABELS},le="1.0"}} 0' in lines
+    assert f'{name}_bucket{{{LABELS},le="5.0"}} 1' in lines
+    assert f'{name}_bucket{{{LABELS},le="50.0"}} 2' in lines
+    assert f'{name}_bucket{{{LABELS},le="2500.0"}} 2' in lines
+    assert f'{name}_bucket{{{LABELS},le="5000.0"}} 3' in lines
+    assert f'{name}_bucket{{{LABELS},le="+Inf"}} 3' in lines
+    assert f"{name}_count{{{LABELS}}} 3" in lines
+    assert f"{name}_sum{{{LABELS}}} 4044.000" in lines
+    buckets = [line for line in lines if line.startswith(f"{name}_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert f'solarmax_decode_duration_milliseconds_bucket{{{LABELS},le="0.025"}} 1' in lines
+
+
+async def test_render_circuit_stateset(hass: HomeAssistant) -> None:
+    """The circuit breaker is a stateset with exactly one state set."""
+    lines = _render(hass)
+    assert "# TYPE solarmax_circuit stateset" in lines
+    assert f'solarmax_circuit{{{LABELS},solarmax_circuit="closed"}} 0' in lines
+    assert f'solarmax_circuit{{{LABELS},solarmax_circuit="open"}} 1' in lines
+    assert f'solarmax_circuit{{{LABELS},solarmax_circuit="half_open"}} 0' in lines
+
+
+async def test_metrics_endpoint(hass: HomeAssistant, hass_client: ClientSessionGenerator) -> None:
+    """The view serves only entries that enabled the endpoint."""
+    assert await async_setup_component(hass, "http", {})
+    enabled = MockConfigEntry(domain=DOMAIN, title="Roof", options={CONF_METRICS_ENDPOINT: True})
+    disabled = MockConfigEntry(domain=DOMAIN, title="Garage", options={CONF_METRICS_ENDPOINT: False})
+    enabled.add_to_hass(hass)
+    disabled.add_to_hass(hass)
+    hass.data.setdefault(DOMAIN, {})
+    garage = _hub()
+    garage.connection.host = "192.0.2.11"
+    hass.data[DOMAIN][disabled.entry_id] = {"hub": garage}
+    async_register_metrics_view(hass)
+    client = await hass_client()
+
+    response = await client.get(f"/api/{DOMAIN}/metrics")
+    assert response.status == 404
+
+    hass.data[DOMAIN][enabled.entry_id] = {"hub": _hub()}
+    response = await client.get(f"/api/{DOMAIN}/metrics")
+    assert response.status == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    text = await response.text()
+    assert text.endswith("# EOF\n")
+    assert f"solarmax_polls_total{{{LABELS}}} 3\n" in text
+    assert "192.0.2.11" not in text
+
+
+async def test_metrics_endpoint_requires_auth(hass: HomeAssistant, hass_client_no_auth: ClientSessionGenerator) -> None:
+    """Scrapes without a token are rejected."""
+    assert await async_setup_component(hass, "http", {})
+    hass.data.setdefault(DOMAIN, {})
+    async_register_metrics_view(hass)
+    client = await hass_client_no_auth()
+    response = await client.get(f"/api/{DOMAIN}/metrics")
+    assert response.status == 401
@@ -0,0 +1,105 @@
+"""Tests for compiling the register maps into key_dict and read spans."""
+
+import pytest
+
+from custom_components.solarmax_modbus_test.const import (
+    MAX_READ_OTHER_TIER,
+    REGISTER_MAPS,
+    TIER_FAST,
+    TIER_SLOW,
+)
+from custom_components.solarmax_modbus_test.register_map import (
+    ReadSpan,
+    compile_register_map,
+    compute_read_spans,
+    register_map_for_model,
+)
+
+
+@pytest.fixture(name="key_dict")
+def key_dict_fixture() -> dict:
+    """Return the key_dict of the SP register map."""
+    return compile_register_map(REGISTER_MAPS["SP"]).key_dict
+
+
+def _field(key: str, address: int, type_: str = "UINT16", **options) -> dict:
+    return {"key": key, "address": address, "type": type_, **options}
+
+
+def test_compile_sp_register_map(key_dict: dict) -> None:
+    """The SP map compiles into one key_dict entry per field."""
+    compiled = compile_register_map(REGISTER_MAPS["SP"])
+    assert len(compiled.key_dict) == len(REGISTER_MAPS["SP"])
+    assert key_dict[4097] == {
+        "key": "L1Voltage", "type": "UINT16", "factor": 0.1, "tier": TIER_FAST, "deadband": 0.15,
+    }
+    assert key_dict[4125]["type"] == "STATUS_INVERTER_MODE"
+    assert key_dict[4124]["tier"] == TIER_SLOW
+
+
+def test_spans_documented_in_readme(key_dict: dict) -> None:
+    """Both tiers, the fast and the slow tier read the documented spans."""
+    assert compile_register_map(REGISTER_MAPS["SP"]).spans == (ReadSpan(4097, 60),)
+    assert compute_read_spans(key_dict) == [ReadSpan(4097, 60)]
+    assert compute_read_spans(key_dict, (TIER_FAST,)) == [ReadSpan(4097, 29), ReadSpan(4151, 4)]
+    assert compute_read_spans(key_dict, (TIER_SLOW,)) == [ReadSpan(4124, 33)]
+
+
+def test_spans_bridge_little_of_other_tier(key_dict: dict) -> None:
+    """The fast tier reads the slow Temperature register instead of splitting."""
+    assert MAX_READ_OTHER_TIER >= 1
+    assert compute_read_spans(key_dict, (TIER_FAST,), max_other=0) == [
+        ReadSpan(4097, 27), ReadSpan(4125, 1), ReadSpan(4151, 4),
+    ]
+
+
+def test_spans_gap_and_count_limits() -> None:
+    """Spans split at gaps wider than max_gap and at max_count registers."""
+    key_dict = compile_register_map([
+        _field("a", 100), _field("b", 103, "UINT32"), _field("c", 110), _field("d", 200),
+    ]).key_dict
+    assert compute_read_spans(key_dict, max_gap=5) == [ReadSpan(100, 11), ReadSpan(200, 1)]
+    assert compute_read_spans(key_dict, max_gap=4) == [ReadSpan(100, 5), ReadSpan(110, 1), ReadSpan(200, 1)]
+    assert compute_read_spans(key_dict, max_gap=100) == [ReadSpan(100, 101)]
+    assert compute_read_spans(key_dict, max_gap=100, max_count=100) == [ReadSpan(100, 11), ReadSpan(200, 1)]
+
+
+def test_spans_of_other_tier_fields() -> None:
+    """A gap holding more than max_other registers of the other tier splits the span."""
+    key_dict = compile_register_map([
+        _field("a", 100), _field("b", 101, "UINT32", tier=TIER_SLOW), _field("c", 103),
+        _field("d", 104, "UINT64", tier=TIER_SLOW), _field("e", 108),
+    ]).key_dict
+    assert compute_read_spans(key_dict, (TIER_FAST,), max_other=2) == [ReadSpan(100, 4), ReadSpan(108, 1)]
+    assert compute_read_spans(key_dict, (TIER_FAST,), max_other=4) == [ReadSpan(100, 9)]
+    assert compute_read_spans(key_dict, (TIER_SLOW,), max_other=1) == [ReadSpan(101, 7)]
+    assert compute_read_spans(key_dict, (TIER_SLOW,), max_other=0) == [ReadSpan(101, 2), ReadSpan(104, 4)]
+
+
+@pytest.mark.parametrize(
+    ("fields", "message"),
+    [
+        ([_field("a", 100), _field("a", 101)], "Duplicate register map key a"),
+        ([_field("a", 100, "UINT32"), _field("b", 101)], "Register 101 \\(b\\) overlaps previous field"),
+        ([_field("a", 100, "FLOAT16")], "Unknown register type FLOAT16"),
+        ([_field("a", 100, "STRING")], "Register type STRING has no fixed width"),
+        ([_field("a", 100, "STATUS_NOPE")], "Unknown status table STATUS_NOPE for a"),
+        ([_field("a", 100, tier="medium")], "Unknown tier medium for a"),
+        ([_field("a", 100, deadband=-1)], "Invalid deadband -1 for a"),
+        ([_field("a", 100, deadband_rel="1%")], "Invalid deadband_rel 1% for a"),
+        ([_field("a", 100, max_age=None)], "Invalid max_age None for a"),
+    ],
+)
+def test_compile_invalid_register_map(fields: list[dict], message: str) -> None:
+    """Invalid register maps are rejected with a ValueError."""
+    with pytest.raises(ValueError, match=message):
+        compile_register_map(fields)
+
+
+@pytest.mark.parametrize(
+    ("model", "register_map"),
+    [("SolarMax 6SMT", "SMT"), ("SolarMax 3000SP", "SP"), ("SolarMax X", "SP"), (None, "SP")],
+)
+def test_register_map_for_model(model: str | None, register_map: str) -> None:
+    """The model selects the register map, unknown models get the default."""
+    assert register_map_for_model(model) is REGISTER_MAPS[register_map]
@@ -0,0 +1,142 @@
+"""Tests for the sample ring buffer and its export."""
+
+import csv
+import math
+import struct
+from array import array
+
+import pytest
+
+from custom_components.solarmax_modbus_test.samples import (
+    SAMPLES_MAGIC,
+    SAMPLES_VERSION,
+    SampleBuffer,
+    write_binary,
+    write_csv,
+)
+
+KEYS = ("L1Voltage", "L1Current")
+
+
+def _fill(buffer: SampleBuffer, times: range) -> None:
+    """Append one row per time, the values are derived from the time."""
+    for timestamp in times:
+        row = buffer.new_row()
+        row[1] = timestamp * 10.0
+        if timestamp % 2:
+            row[2] = timestamp / 10
+        buffer.append(float(timestamp), row)
+
+
+def _times(samples: array, width: int = len(KEYS) + 1) -> list[float]:
+    return list(samples[::width])
+
+
+def test_empty_buffer() -> None:
+    """An empty buffer returns empty snapshots."""
+    buffer = SampleBuffer(KEYS, 4)
+    assert len(buffer) == 0
+    assert buffer.memory == 4 * 3 * 8
+    assert buffer.snapshot() == array("d")
+    assert buffer.snapshot(0, 100) == array("d")
+
+
+def test_new_row_is_nan() -> None:
+    """Fields not decoded by a poll stay NaN."""
+    buffer = SampleBuffer(KEYS, 4)
+    assert buffer.columns == {"L1Voltage": 1, "L1Current": 2}
+    assert all(math.isnan(value) for value in buffer.new_row())
+
+
+def test_ring_wrap_keeps_newest_rows() -> None:
+    """A full buffer overwrites its oldest rows and keeps time order."""
+    buffer = SampleBuffer(KEYS, 4)
+    _fill(buffer, range(1, 4))
+    assert len(buffer) == 3
+    assert _times(buffer.snapshot()) == [1, 2, 3]
+
+    _fill(buffer, range(4, 11))
+    assert len(buffer) == 4
+    samples = buffer.snapshot()
+    assert _times(samples) == [7, 8, 9, 10]
+    assert list(samples[1::3]) == [70, 80, 90, 100]
+    # Rows wrap around the end of the storage, the snapshot is still contiguous
+    assert len(samples) == 4 * 3
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "expected"),
+    [
+        (None, None, [7, 8, 9, 10]),
+        (8, None, [8, 9, 10]),
+        (None, 8, [7, 8]),
+        (8, 9, [8, 9]),  # Both bounds inclusive
+        (7.5, 9.5, [8, 9]),
+        (9, 9, [9]),
+        (0, 6, []),
+        (11, 20, []),
+        (9, 8, []),
+    ],
+)
+def test_snapshot_bounds(start: float | None, end: float | None, expected: list[float]) -> None:
+    """Snapshots select the rows between start and end across the wrap."""
+    buffer = SampleBuffer(KEYS, 4)
+    _fill(buffer, range(1, 11))
+    assert _times(buffer.snapshot(start, end)) == expected
+
+
+def test_disabled_buffer() -> None:
+    """A depth of 0 stores nothing."""
+    buffer = SampleBuffer(KEYS, 0)
+    _fill(buffer, range(1, 4))
+    assert len(buffer) == 0
+    assert buffer.snapshot() == array("d")
+
+
+@pytest.mark.parametrize(("depth", "expected"), [(2, [9, 10]), (6, [7, 8, 9, 10])])
+def test_resize_keeps_newest_rows(depth: int, expected: list[float]) -> None:
+    """Resizing keeps the most recent rows that still fit."""
+    buffer = SampleBuffer(KEYS, 4)
+    _fill(buffer, range(1, 11))
+    buffer.resize(depth)
+    assert buffer.depth == depth
+    assert _times(buffer.snapshot()) == expected
+    _fill(buffer, range(11, 12))
+    assert _times(buffer.snapshot())[-1] == 11
+
+
+def test_write_csv(tmp_path) -> None:
+    """CSV export has a header row and empty cells for NaN."""
+    buffer = SampleBuffer(KEYS, 4)
+    _fill(buffer, range(1, 3))
+    path = tmp_path / "samples.csv"
+    assert write_csv(str(path), KEYS, buffer.snapshot()) == 2
+    with open(path, encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows == [
+        ["timestamp", "L1Voltage", "L1Current"],
+        ["1.000", "10", "0.1"],
+        ["2.000", "20", ""],
+    ]
+
+
+def test_write_binary(tmp_path) -> None:
+    """Binary export is a header, the column names and float64 rows."""
+    buffer = SampleBuffer(KEYS, 4)
+    _fill(buffer, range(1, 7))
+    samples = buffer.snapshot()
+    path = tmp_path / "samples.bin"
+    assert write_binary(str(path), KEYS, samples) == 4
+
+    data = path.read_bytes()
+    header = struct.Struct("<4sHHII")
+    magic, version, width, rows, names_length = header.unpack_from(data)
+    assert (magic, version, width, rows) == (SAMPLES_MAGIC, SAMPLES_VERSION, 3, 4)
+    names = data[header.size:header.size + names_length].decode()
+    assert names.split("\n") == ["timestamp", *KEYS]
+    values = struct.unpack_from(f"<{width * rows}d", data, header.size + names_length)
+    assert len(data) == header.size + names_length + width * rows * 8
+    assert values[0::3] == (3.0, 4.0, 5.0, 6.0)
+    assert values[1::3] == (30.0, 40.0, 50.0, 60.0)
+    assert values[2] == 0.3
+    assert math.isnan(values[5])